@@ -1,6 +1,6 @@
 import time
 import random
-from typing import Iterator, TypeVar
+from typing import Any, Callable, Iterator, List, Optional, Tuple, TypeVar
 
 T = TypeVar('T')
 
@@ -10,6 +10,48 @@ def fibonacci_generator() -> Iterator[int]:
         yield a
         a, b = b, a + b
 
+def _fib_pair(n: int) -> Tuple[int, int]:
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == '1':
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    return a, b
+
+def fib(n: int) -> int:
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    return _fib_pair(n)[0]
+
+def fib_range(start: int, stop: Optional[int] = None) -> Iterator[int]:
+    if start < 0:
+        raise ValueError("start must be non-negative")
+    a, b = _fib_pair(start)
+    n = start
+    while stop is None or n < stop:
+        yield a
+        a, b = b, a + b
+        n += 1
+
+def fib_chunks(start: int, stop: Optional[int] = None, chunk_size: int = 1024) -> Iterator[List[int]]:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if start < 0:
+        raise ValueError("start must be non-negative")
+    a, b = _fib_pair(start)
+    n = start
+    while stop is None or n < stop:
+        size = chunk_size if stop is None else min(chunk_size, stop - n)
+        chunk = [0] * size
+        for i in range(size):
+            chunk[i] = a
+            a, b = b, a + b
+        n += size
+        yield chunk
+
 def consume_with_timeout(iterator: Iterator[T], timeout_seconds: float) -> None:
     start_time = time.time()
     count = 0
@@ -31,6 +73,103 @@ def consume_with_timeout(iterator: Iterator[T], timeout_seconds: float) -> None:
     if count > 0 and isinstance(value, (int, float)):
         print(f"Final total: {total}, Final average: {avg:.2f}")
 
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst is not None and burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate / 100)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def acquire(self, tokens: float = 1.0, deadline: Optional[float] = None) -> bool:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            wait = (tokens - self.tokens) / self.rate
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                wait = min(wait, deadline - now)
+            time.sleep(wait)
+
+_TIMED_OUT = object()
+
+def _throttled(iterator: Iterator[T], bucket: TokenBucket, deadline: Optional[float]) -> Iterator[Any]:
+    iterator = iter(iterator)
+    while True:
+        if not bucket.acquire(deadline=deadline):
+            yield _TIMED_OUT
+            return
+        try:
+            value = next(iterator)
+        except StopIteration:
+            return
+        yield value
+
+def consume(iterator: Iterator[T], timeout_seconds: Optional[float] = None,
+            sink: Optional[Callable[[T], Any]] = None, rate: Optional[float] = None,
+            burst: Optional[float] = None, check_every: int = 256) -> dict:
+    bucket = TokenBucket(rate, burst) if rate is not None else None
+    clock = time.monotonic
+    start_time = clock()
+    deadline = start_time + timeout_seconds if timeout_seconds is not None else None
+    source = _throttled(iterator, bucket, deadline) if bucket is not None else iterator
+    # The deadline is checked every `stride` items, sized from the measured
+    # per-item cost so a check happens about once a millisecond (at most `check_every`).
+    check_every = max(1, check_every)
+    stride = 1
+    last_check = start_time
+    count = 0
+    numeric_count = 0
+    total = 0
+    minimum = None
+    maximum = None
+    exhausted = False
+    next_check = stride
+    for value in source:
+        if value is _TIMED_OUT:
+            break
+        if sink is not None:
+            sink(value)
+        count += 1
+        if isinstance(value, (int, float)):
+            numeric_count += 1
+            total += value
+            if minimum is None or value < minimum:
+                minimum = value
+            if maximum is None or value > maximum:
+                maximum = value
+        if deadline is not None and count >= next_check:
+            now = clock()
+            if now >= deadline:
+                break
+            per_item = (now - last_check) / stride
+            stride = min(check_every, int(0.001 / per_item)) if per_item > 0 else check_every
+            stride = max(1, min(stride, int((deadline - now) / per_item) if per_item > 0 else stride))
+            last_check = now
+            next_check = count + stride
+    else:
+        exhausted = True
+    elapsed = clock() - start_time
+    return {
+        'count': count,
+        'elapsed': elapsed,
+        'throughput': count / elapsed if elapsed > 0 else float('inf'),
+        'exhausted': exhausted,
+        'numeric_count': numeric_count,
+        'total': total,
+        'average': total / numeric_count if numeric_count else None,
+        'min': minimum,
+        'max': maximum,
+    }
+
 if __name__ == "__main__":
     print("Test 1: Running Fibonacci generator for 2 seconds")
     fib_iter = fibonacci_generator()
@@ -39,3 +178,14 @@ if __name__ == "__main__":
     print("\nTest 2: Running Fibonacci generator for 0.5 seconds")
     fib_iter = fibonacci_generator()
     consume_with_timeout(fib_iter, 0.5)
+
+    print("\nTest 3: Random access and ranges")
+    print(f"fib(100) = {fib(100)}")
+    print(f"fib_range(10, 15) = {list(fib_range(10, 15))}")
+    print(f"fib_chunks(0, 10, chunk_size=4) = {list(fib_chunks(0, 10, chunk_size=4))}")
+
+    print("\nTest 4: Rate-limited and unthrottled consumption")
+    stats = consume(fibonacci_generator(), 0.5, rate=1000)
+    print(f"Rate-limited: {stats['count']} items, {stats['throughput']:.0f} items/s")
+    stats = consume(iter(range(10**9)), 0.5)
+    print(f"Unthrottled: {stats['count']} items, {stats['throughput']:.0f} items/s, average: {stats['average']:.2f}")
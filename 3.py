@@ -1,12 +1,290 @@
 from typing import Callable, Any, Tuple
+import asyncio
 import functools
-from collections import OrderedDict
+import hashlib
+import inspect
+import logging
+import pickle
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict, deque
+import heapq
+import os
+import tempfile
 import time
 
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _canonical(obj: Any) -> str:
+    # Deterministic across processes: set/dict order and pickle memo sharing do not leak in.
+    kind = type(obj)
+    if obj is None or kind in (bool, int, float, complex, str, bytes):
+        return f"{kind.__name__}:{obj!r}"
+    if kind in (tuple, list):
+        return f"{kind.__name__}[{','.join(map(_canonical, obj))}]"
+    if kind in (set, frozenset):
+        return f"{kind.__name__}{{{','.join(sorted(map(_canonical, obj)))}}}"
+    if kind is dict:
+        return f"dict{{{','.join(sorted(f'{_canonical(k)}:{_canonical(v)}' for k, v in obj.items()))}}}"
+    return f"{kind.__module__}.{kind.__qualname__}:{pickle.dumps(obj, protocol=4).hex()}"
+
+class _Flight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class _LFUIndex:
+    def __init__(self, counts: dict):
+        self.counts = counts
+        self.buckets = {}
+        self.min_freq = 0
+
+    def add(self, key: Any, freq: int = 1) -> None:
+        self.counts[key] = freq
+        self.buckets.setdefault(freq, OrderedDict())[key] = None
+        if len(self.counts) == 1 or freq < self.min_freq:
+            self.min_freq = freq
+
+    def touch(self, key: Any) -> None:
+        freq = self.counts[key]
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.counts[key] = freq + 1
+        self.buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def remove(self, key: Any) -> None:
+        freq = self.counts.pop(key)
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+
+    def victim(self) -> Any:
+        if self.min_freq not in self.buckets:
+            self.min_freq = min(self.buckets)
+        return next(iter(self.buckets[self.min_freq]))
+
+class _ARCIndex:
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity
+        self.p = 0.0
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+
+    def _target(self) -> int:
+        if self.capacity is not None:
+            return self.capacity
+        return max(1, len(self.t1) + len(self.t2))
+
+    def add(self, key: Any, freq: int = 1) -> None:
+        if key in self.b1:
+            self.p = min(self._target(), self.p + max(1.0, len(self.b2) / len(self.b1)))
+            del self.b1[key]
+            self.t2[key] = None
+        elif key in self.b2:
+            self.p = max(0.0, self.p - max(1.0, len(self.b1) / len(self.b2)))
+            del self.b2[key]
+            self.t2[key] = None
+        elif freq > 1:
+            self.t2[key] = None
+        else:
+            self.t1[key] = None
+
+    def touch(self, key: Any) -> None:
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def remove(self, key: Any) -> None:
+        if key in self.t1:
+            del self.t1[key]
+            self.b1[key] = None
+        else:
+            del self.t2[key]
+            self.b2[key] = None
+        target = self._target()
+        while self.b1 and len(self.t1) + len(self.b1) > target:
+            self.b1.popitem(last=False)
+        while self.b2 and len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) > 2 * target:
+            self.b2.popitem(last=False)
+
+    def victim(self) -> Any:
+        if self.t1 and (len(self.t1) > self.p or not self.t2):
+            return next(iter(self.t1))
+        return next(iter(self.t2))
+
+_SKETCH_SEEDS = (0x97CB3127, 0xB2A4F1C5, 0xE6546B64, 0x85EBCA6B)
+_HALVE = bytes(i >> 1 for i in range(256))
+
+class _FrequencySketch:
+    def __init__(self, capacity: int):
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in _SKETCH_SEEDS]
+        self.sample_size = 10 * width
+        self.additions = 0
+
+    def _indexes(self, key: Any) -> list:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        return [(((h ^ seed) * 0x9E3779B97F4A7C15) >> 32) & self.mask for seed in _SKETCH_SEEDS]
+
+    def increment(self, key: Any) -> None:
+        added = False
+        for row, i in zip(self.rows, self._indexes(key)):
+            if row[i] < 15:
+                row[i] += 1
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.rows = [row.translate(_HALVE) for row in self.rows]
+                self.additions //= 2
+
+    def frequency(self, key: Any) -> int:
+        return min(row[i] for row, i in zip(self.rows, self._indexes(key)))
+
+class _TinyLFUIndex:
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity
+        self.sketch = _FrequencySketch(capacity or 1024)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.candidate = None
+
+    def _sizes(self) -> Tuple[int, int]:
+        capacity = self.capacity
+        if capacity is None:
+            capacity = max(1, len(self.window) + len(self.probation) + len(self.protected))
+        window_size = max(1, capacity // 100)
+        return window_size, int((capacity - window_size) * 0.8)
+
+    def add(self, key: Any, freq: int = 1) -> None:
+        self.sketch.increment(key)
+        self.window[key] = None
+        window_size, _ = self._sizes()
+        if len(self.window) > window_size:
+            candidate, _ = self.window.popitem(last=False)
+            self.probation[candidate] = None
+            self.candidate = candidate
+
+    def touch(self, key: Any) -> None:
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            _, protected_size = self._sizes()
+            while len(self.protected) > protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def remove(self, key: Any) -> None:
+        if key == self.candidate:
+            self.candidate = None
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                del segment[key]
+                return
+
+    def victim(self) -> Any:
+        candidate, self.candidate = self.candidate, None
+        if self.probation:
+            victim = next(iter(self.probation))
+            if candidate is not None and candidate != victim and candidate in self.probation:
+                if self.sketch.frequency(candidate) <= self.sketch.frequency(victim):
+                    return candidate
+            return victim
+        if self.protected:
+            return next(iter(self.protected))
+        return next(iter(self.window))
+
+class _DiskCache:
+    def __init__(self, path: str, policy: str, max_entries: int = None, trim_interval: int = 64):
+        self.policy = policy
+        self.max_entries = max_entries
+        self.trim_interval = trim_interval
+        self.writes = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value BLOB, "
+                          "accessed REAL, hits INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memo_accessed ON memo (accessed)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memo_hits ON memo (hits, accessed)")
+
+    def get(self, digest: str, current_time: float, expiry_time: float = None) -> Tuple[Any, int]:
+        with self.lock:
+            row = self.conn.execute("SELECT value, accessed, hits FROM memo WHERE key = ?", (digest,)).fetchone()
+            if row is None:
+                return _MISSING, 0
+            value, accessed, hits = row
+            if expiry_time is not None and current_time - accessed > expiry_time:
+                self.conn.execute("DELETE FROM memo WHERE key = ?", (digest,))
+                return _MISSING, 0
+            self.conn.execute("UPDATE memo SET accessed = ?, hits = hits + 1 WHERE key = ?", (current_time, digest))
+            self.hits += 1
+        return pickle.loads(value), hits + 1
+
+    def put(self, digest: str, value: Any, current_time: float) -> None:
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        with self.lock:
+            self.conn.execute("INSERT INTO memo (key, value, accessed, hits) VALUES (?, ?, ?, 1) "
+                              "ON CONFLICT(key) DO UPDATE SET value = excluded.value, accessed = excluded.accessed",
+                              (digest, blob, current_time))
+            self.writes += 1
+            if self.max_entries is not None and self.writes % self.trim_interval == 0:
+                self._trim()
+
+    def demote(self, digest: str, hits: int, current_time: float) -> None:
+        with self.lock:
+            self.conn.execute("UPDATE memo SET accessed = ?, hits = MAX(hits, ?) WHERE key = ?",
+                              (current_time, hits, digest))
+
+    def _trim(self) -> None:
+        order = "hits, accessed" if self.policy == 'lfu' else "accessed"
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM memo").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(f"DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY {order} LIMIT ?)",
+                              (count - self.max_entries,))
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
 class Memoizer:
     def __init__(self, func: Callable[..., Any], max_cache_size: int = None, 
                  eviction_policy: str = 'LRU', expiry_time: float = None, 
-                 custom_eviction: Callable[[dict, dict], None] = None):
+                 custom_eviction: Callable[[dict, dict], None] = None,
+                 thread_safe: bool = False, read_buffer_size: int = 64,
+                 disk_path: str = None, disk_max_entries: int = None,
+                 max_weight: float = None, weigher: Callable[[Any, Any], float] = None,
+                 track_latency: bool = False, stats_hook: Callable[[dict], None] = None,
+                 stats_interval: float = 60.0, disk_namespace: str = None):
         self.func = func
         self.max_cache_size = max_cache_size
         self.eviction_policy = eviction_policy.lower() if isinstance(eviction_policy, str) else 'custom'
@@ -15,56 +293,444 @@ class Memoizer:
         self.cache = OrderedDict() if self.eviction_policy == 'lru' else {}
         self.access_counts = {} if self.eviction_policy == 'lfu' else {}
         self.timestamps = {} if self.expiry_time is not None else {}
+        if self.eviction_policy == 'lfu':
+            self._index = _LFUIndex(self.access_counts)
+        elif self.eviction_policy == 'arc':
+            self._index = _ARCIndex(max_cache_size)
+        elif self.eviction_policy in ('tinylfu', 'w-tinylfu'):
+            self._index = _TinyLFUIndex(max_cache_size)
+        else:
+            self._index = None
+        self.max_weight = max_weight
+        self.weigher = weigher if weigher is not None else (lambda key, value: sys.getsizeof(value))
+        self.weights = {}
+        self.total_weight = 0
+        self._expiry_heap = []
+        self._expiry_seq = {}
+        self._seq = 0
+        self.thread_safe = thread_safe
+        self.is_async = inspect.iscoroutinefunction(func)
+        self._lock = threading.Lock() if thread_safe else None
+        self._read_buffer = deque()
+        self._read_buffer_size = read_buffer_size
+        self._inflight = {}
+        self._inflight_async = {}
+        self._disk = _DiskCache(disk_path, self.eviction_policy, disk_max_entries) if disk_path is not None else None
+        qualname = getattr(func, '__qualname__', None)
+        if disk_path is not None and disk_namespace is None and (
+                qualname is None or '<lambda>' in qualname or '<locals>' in qualname):
+            raise ValueError("disk_namespace is required to share a disk cache for lambdas, "
+                             "nested functions and callable objects")
+        self._namespace = disk_namespace if disk_namespace is not None else f"{func.__module__}.{qualname}"
+        self.track_latency = track_latency
+        self.stats_hook = stats_hook
+        self.stats_interval = stats_interval
+        self._next_export = time.monotonic() + stats_interval
+        self._pending_export = None
+        self.reset_stats()
         functools.update_wrapper(self, func)
     
     def __call__(self, *args, **kwargs) -> Any:
         key = self._make_key(args, kwargs)
+        if self.is_async:
+            call = self._call_async(key, args, kwargs)
+            if self.track_latency:
+                call = self._timed_async(call)
+            if self.stats_hook is not None:
+                call = self._exported_async(call)
+            return call
+        if not self.track_latency and self.stats_hook is None:
+            if self.thread_safe:
+                return self._call_thread_safe(key, args, kwargs)
+            return self._call_serial(key, args, kwargs)
+        start = time.perf_counter()
+        try:
+            if self.thread_safe:
+                return self._call_thread_safe(key, args, kwargs)
+            return self._call_serial(key, args, kwargs)
+        finally:
+            if self.track_latency:
+                self._observe_latency(time.perf_counter() - start)
+            if self._pending_export is not None:
+                self._flush_export()
+
+    def _call_serial(self, key: Any, args: Tuple, kwargs: dict) -> Any:
         current_time = time.time()
+        result = self._lookup(key, current_time)
+        if result is not _MISSING:
+            return result
+        result, freq, elapsed = self._load(key, args, kwargs, current_time)
+        self._store(key, result, current_time, freq, elapsed)
+        return result
+
+    def _load(self, key: Any, args: Tuple, kwargs: dict, current_time: float) -> Tuple[Any, int, float]:
+        digest, result, freq = self._disk_get(key, current_time)
+        if result is not _MISSING:
+            return result, freq, 0.0
+        start = time.perf_counter()
+        result = self.func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self._disk_put(digest, result, current_time)
+        return result, freq, elapsed
+
+    def _call_thread_safe(self, key: Any, args: Tuple, kwargs: dict) -> Any:
+        current_time = time.time()
+        result = self._fast_lookup(key, current_time)
+        if result is not _MISSING:
+            return result
+        with self._lock:
+            self._drain_reads()
+            result = self._lookup(key, current_time)
+            if result is not _MISSING:
+                return result
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            try:
+                result, freq, elapsed = self._load(key, args, kwargs, current_time)
+            except BaseException:
+                with self._lock:
+                    del self._inflight[key]
+                raise
+            with self._lock:
+                try:
+                    self._store(key, result, current_time, freq, elapsed)
+                finally:
+                    del self._inflight[key]
+            flight.result = result
+            return result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.event.set()
+
+    async def _call_async(self, key: Any, args: Tuple, kwargs: dict) -> Any:
+        current_time = time.time()
+        loop = asyncio.get_running_loop()
+        while True:
+            result = self._get(key, current_time)
+            if result is not _MISSING:
+                return result
+            flight = self._inflight_async.get(key)
+            if flight is None or flight.get_loop() is not loop:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+        flight = loop.create_future()
+        self._inflight_async[key] = flight
+        elapsed = 0.0
+        try:
+            digest, result, freq = self._disk_get(key, current_time)
+            if result is _MISSING:
+                start = time.perf_counter()
+                result = await self.func(*args, **kwargs)
+                elapsed = time.perf_counter() - start
+                self._disk_put(digest, result, current_time)
+            self._put(key, result, current_time, freq, elapsed)
+        except BaseException as e:
+            if self._inflight_async.get(key) is flight:
+                del self._inflight_async[key]
+            if isinstance(e, asyncio.CancelledError):
+                flight.cancel()
+            else:
+                flight.set_exception(e)
+                flight.exception()
+            raise
+        if self._inflight_async.get(key) is flight:
+            del self._inflight_async[key]
+        flight.set_result(result)
+        return result
+
+    def _get(self, key: Any, current_time: float) -> Any:
+        if not self.thread_safe:
+            return self._lookup(key, current_time)
+        result = self._fast_lookup(key, current_time)
+        if result is not _MISSING:
+            return result
+        with self._lock:
+            self._drain_reads()
+            return self._lookup(key, current_time)
+
+    async def _exported_async(self, call: Any) -> Any:
+        try:
+            return await call
+        finally:
+            if self._pending_export is not None:
+                self._flush_export()
+
+    async def _timed_async(self, call: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await call
+        finally:
+            self._observe_latency(time.perf_counter() - start)
+
+    def _put(self, key: Any, result: Any, current_time: float, freq: int = 1, elapsed: float = 0.0) -> None:
+        if not self.thread_safe:
+            self._store(key, result, current_time, freq, elapsed)
+            return
+        with self._lock:
+            self._store(key, result, current_time, freq, elapsed)
+
+    def _lookup(self, key: Any, current_time: float) -> Any:
         if self.expiry_time is not None:
             self._remove_expired(current_time)
+        if key not in self.cache:
+            return _MISSING
+        self.hits += 1
+        self._record_hit(key, current_time)
+        if self.stats_hook is not None:
+            self._maybe_export()
+        return self.cache[key]
+
+    def _fast_lookup(self, key: Any, current_time: float) -> Any:
+        # Lock-free read: policy bookkeeping is replayed later from the read buffer.
+        result = self.cache.get(key, _MISSING)
+        if result is _MISSING:
+            return _MISSING
+        if self.expiry_time is not None:
+            timestamp = self.timestamps.get(key)
+            if timestamp is None or current_time - timestamp > self.expiry_time:
+                return _MISSING
+        self._read_buffer.append((key, current_time))
+        if len(self._read_buffer) >= self._read_buffer_size and self._lock.acquire(blocking=False):
+            try:
+                self._drain_reads()
+            finally:
+                self._lock.release()
+        return result
+
+    def _drain_reads(self) -> None:
+        buffer = self._read_buffer
+        while buffer:
+            key, current_time = buffer.popleft()
+            self.hits += 1
+            if key in self.cache:
+                self._record_hit(key, current_time)
+        if self.stats_hook is not None:
+            self._maybe_export()
+
+    def _record_hit(self, key: Any, current_time: float) -> None:
+        if self.eviction_policy == 'lru':
+            self.cache.move_to_end(key)
+        elif self._index is not None:
+            self._index.touch(key)
+        if self.expiry_time is not None:
+            self.timestamps[key] = current_time
+    
+    def _make_key(self, args: Tuple, kwargs: dict) -> Tuple:
+        kwargs_items = sorted(kwargs.items())
+        return (args, tuple(kwargs_items))
+
+    def _digest(self, key: Any) -> str:
+        try:
+            payload = f"{self._namespace}\0{_canonical(key)}".encode()
+        except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+            return None
+        return hashlib.sha256(payload).hexdigest()
+
+    def _disk_get(self, key: Any, current_time: float) -> Tuple[str, Any, int]:
+        if self._disk is None:
+            return None, _MISSING, 1
+        digest = self._digest(key)
+        if digest is None:
+            return None, _MISSING, 1
+        result, hits = self._disk.get(digest, current_time, self.expiry_time)
+        return digest, result, max(hits, 1)
+
+    def _disk_put(self, digest: str, result: Any, current_time: float) -> None:
+        if digest is not None:
+            self._disk.put(digest, result, current_time)
+
+    def _demote(self, key: Any) -> None:
+        if self._disk is None:
+            return
+        digest = self._digest(key)
+        if digest is not None:
+            self._disk.demote(digest, self.access_counts.get(key, 1), self.timestamps.get(key, time.time()))
+
+    def _store(self, key: Any, result: Any, current_time: float, freq: int = 1, elapsed: float = 0.0) -> None:
+        self.misses += 1
+        self.compute_time += elapsed
+        if self.stats_hook is not None:
+            self._maybe_export()
+        weight = 0
+        if self.max_weight is not None:
+            weight = self.weigher(key, result)
+            if weight > self.max_weight:
+                if key in self.cache:
+                    self._discard(key, 'capacity')
+                return
         if key in self.cache:
-            if self.eviction_policy == 'lru':
-                self.cache.move_to_end(key)
-            elif self.eviction_policy == 'lfu':
-                self.access_counts[key] = self.access_counts.get(key, 0) + 1
-            if self.expiry_time is not None:
-                self.timestamps[key] = current_time
-            return self.cache[key]
-        result = self.func(*args, **kwargs)
+            self.cache[key] = result
+            if self.max_weight is not None:
+                self.total_weight += weight - self.weights[key]
+                self.weights[key] = weight
+                self._evict()
+            return
         self.cache[key] = result
-        if self.eviction_policy == 'lfu':
-            self.access_counts[key] = self.access_counts.get(key, 0) + 1
+        if self.max_weight is not None:
+            self.weights[key] = weight
+            self.total_weight += weight
+        if self._index is not None:
+            self._index.add(key, freq)
         if self.expiry_time is not None:
             self.timestamps[key] = current_time
+            self._schedule_expiry(key, current_time)
+        self._evict()
+
+    def _over_capacity(self) -> bool:
         if self.max_cache_size is not None and len(self.cache) > self.max_cache_size:
+            return True
+        return self.max_weight is not None and self.total_weight > self.max_weight
+
+    def _evict(self) -> None:
+        while self.cache and self._over_capacity():
             if self.eviction_policy == 'lru':
-                self.cache.popitem(last=False)
-            elif self.eviction_policy == 'lfu':
-                least_freq_key = min(self.access_counts, key=self.access_counts.get)
-                del self.cache[least_freq_key]
-                del self.access_counts[least_freq_key]
+                victim = next(iter(self.cache))
+            elif self._index is not None:
+                victim = self._index.victim()
             elif self.eviction_policy == 'custom' and self.custom_eviction:
+                size = len(self.cache)
                 self.custom_eviction(self.cache, self.access_counts)
-        return result
-    
-    def _make_key(self, args: Tuple, kwargs: dict) -> Tuple:
-        kwargs_items = sorted(kwargs.items())
-        return (args, tuple(kwargs_items))
+                if self.max_weight is not None:
+                    for key in [k for k in self.weights if k not in self.cache]:
+                        self.total_weight -= self.weights.pop(key)
+                if len(self.cache) >= size:
+                    return
+                self.evictions['custom'] += size - len(self.cache)
+                continue
+            else:
+                return
+            self._demote(victim)
+            self._discard(victim, 'capacity')
+
+    def _discard(self, key: Any, cause: str) -> None:
+        self.evictions[cause] += 1
+        del self.cache[key]
+        if self._index is not None:
+            self._index.remove(key)
+        elif key in self.access_counts:
+            del self.access_counts[key]
+        self.timestamps.pop(key, None)
+        self._expiry_seq.pop(key, None)
+        if key in self.weights:
+            self.total_weight -= self.weights.pop(key)
+
+    def _schedule_expiry(self, key: Any, timestamp: float) -> None:
+        self._seq += 1
+        self._expiry_seq[key] = self._seq
+        heapq.heappush(self._expiry_heap, (timestamp, self._seq, key))
+        if len(self._expiry_heap) > 2 * len(self._expiry_seq) + 64:
+            self._expiry_heap = [entry for entry in self._expiry_heap if self._expiry_seq.get(entry[2]) == entry[1]]
+            heapq.heapify(self._expiry_heap)
     
     def _remove_expired(self, current_time: float) -> None:
-        expired_keys = [k for k, t in self.timestamps.items() if current_time - t > self.expiry_time]
-        for key in expired_keys:
-            del self.cache[key]
-            if key in self.access_counts:
-                del self.access_counts[key]
-            del self.timestamps[key]
+        while self._expiry_heap and current_time - self._expiry_heap[0][0] > self.expiry_time:
+            timestamp, seq, key = heapq.heappop(self._expiry_heap)
+            if self._expiry_seq.get(key) != seq:
+                continue
+            if key not in self.cache:
+                self.timestamps.pop(key, None)
+                del self._expiry_seq[key]
+            elif current_time - self.timestamps[key] > self.expiry_time:
+                self._discard(key, 'expiry')
+            else:
+                self._schedule_expiry(key, self.timestamps[key])
     
+    def _observe_latency(self, latency: float) -> None:
+        # Unlocked on purpose: in thread-safe mode these counters are best-effort.
+        self.calls += 1
+        self.total_latency += latency
+        bucket = int(latency * 1e6).bit_length()
+        self.latency_histogram[min(bucket, len(self.latency_histogram) - 1)] += 1
+
+    def _maybe_export(self) -> None:
+        now = time.monotonic()
+        if now >= self._next_export:
+            self._next_export = now + self.stats_interval
+            # Taken under the lock, exported by the caller once it has been released.
+            self._pending_export = self._snapshot()
+
+    def _flush_export(self) -> None:
+        snapshot, self._pending_export = self._pending_export, None
+        if snapshot is None:
+            return
+        try:
+            self.stats_hook(snapshot)
+        except Exception:
+            logger.exception("Memoizer stats_hook failed")
+
+    def _snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        disk_hits = self._disk.hits if self._disk is not None else 0
+        snapshot = {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'coalesced': self.coalesced,
+            'disk_hits': disk_hits,
+            'evictions': dict(self.evictions),
+            'compute_time': self.compute_time,
+        }
+        if self.track_latency:
+            snapshot['calls'] = self.calls
+            snapshot['cache_time'] = max(0.0, self.total_latency - self.compute_time)
+            snapshot['latency_histogram_us'] = {
+                (1 << i) - 1: count for i, count in enumerate(self.latency_histogram) if count
+            }
+        return snapshot
+
+    def stats_snapshot(self) -> dict:
+        if not self.thread_safe:
+            return self._snapshot()
+        with self._lock:
+            self._drain_reads()
+            return self._snapshot()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = {'capacity': 0, 'expiry': 0, 'custom': 0}
+        self.compute_time = 0.0
+        self.calls = 0
+        self.total_latency = 0.0
+        self.latency_histogram = [0] * 32
+        if self._disk is not None:
+            self._disk.hits = 0
+
+    def export_stats(self) -> None:
+        if self.stats_hook is not None:
+            self.stats_hook(self.stats_snapshot())
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
     def cache_stats(self) -> dict:
         return {
             'size': len(self.cache),
             'max_size': self.max_cache_size,
+            'weight': self.total_weight,
+            'max_weight': self.max_weight,
             'policy': self.eviction_policy,
-            'expiry_time': self.expiry_time
+            'expiry_time': self.expiry_time,
+            **self.stats_snapshot()
         }
 
 if __name__ == "__main__":
@@ -91,4 +757,34 @@ if __name__ == "__main__":
     print(f"Fib(6) = {memoized_fib(6)}")  
     print(f"Fib(7) = {memoized_fib(7)}")   
     print(f"Fib(8) = {memoized_fib(8)}")   
-    print(f"Cache stats: {memoized_fib.cache_stats()}")
\ No newline at end of file
+    print(f"Cache stats: {memoized_fib.cache_stats()}")
+    print("Test 5: Thread-safe memoizer with single-flight deduplication")
+    calls = []
+    def slow_square(n: int) -> int:
+        calls.append(n)
+        time.sleep(0.1)
+        return n * n
+    shared_square = Memoizer(slow_square, max_cache_size=10, thread_safe=True)
+    workers = [threading.Thread(target=shared_square, args=(7,)) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    print(f"Square(7) = {shared_square(7)}, computed {len(calls)} time(s)")
+
+    print("Test 6: Two-tier memoizer with a shared disk cache")
+    disk_path = os.path.join(tempfile.mkdtemp(), "memo.sqlite")
+    cold = Memoizer(slow_square, max_cache_size=2, disk_path=disk_path)
+    print(f"Cold squares: {[cold(n) for n in range(4)]}")
+    cold.close()
+    calls.clear()
+    warm = Memoizer(slow_square, max_cache_size=2, disk_path=disk_path)
+    print(f"Warm squares: {[warm(n) for n in range(4)]}, recomputed {len(calls)} time(s)")
+    warm.close()
+
+    print("Test 7: Weighted capacity with W-TinyLFU admission")
+    make_blob = Memoizer(lambda n: b"x" * n, max_weight=4096, weigher=lambda key, value: len(value),
+                         eviction_policy='W-TinyLFU')
+    for n in (1024, 512, 1024, 2048, 512, 3000, 1024):
+        make_blob(n)
+    print(f"Cache stats: {make_blob.cache_stats()}")
@@ -1,21 +1,102 @@
+import asyncio
 import heapq
-from typing import Any, Tuple
+from typing import Any, Callable, Iterable, List, Tuple
 from collections import deque
 
+_MODES = ('highest', 'lowest', 'oldest', 'newest')
+
+class QueueEntry:
+    __slots__ = ('priority', 'entry_id', 'item', 'removed', 'queue')
+
+    def __init__(self, priority: float, entry_id: int, item: Any, queue: 'BiPriorityQueue'):
+        self.priority = priority
+        self.entry_id = entry_id
+        self.item = item
+        self.removed = False
+        self.queue = queue
+
+    @property
+    def active(self) -> bool:
+        return not self.removed
+
+    def update_priority(self, priority: float) -> None:
+        self.queue.update_priority(self, priority)
+
+    def remove(self) -> Any:
+        return self.queue.remove(self)
+
 class BiPriorityQueue:
-    def __init__(self):
+    entry_class = QueueEntry
+
+    def __init__(self, compact_threshold: int = 1024):
         self.min_heap = []
         self.max_heap = []
         self.entry_count = 0
-        self.removed = set()
+        self.size = 0
         self.order_deque = deque()
+        self.compact_threshold = compact_threshold
 
-    def enqueue(self, item: Any, priority: float) -> None:
-        entry = (priority, self.entry_count, item)
-        heapq.heappush(self.min_heap, entry)
-        heapq.heappush(self.max_heap, (-priority, self.entry_count, item))
-        self.order_deque.append((self.entry_count, item))
+    def __len__(self) -> int:
+        return self.size
+
+    def enqueue(self, item: Any, priority: float) -> QueueEntry:
+        entry = QueueEntry(priority, self.entry_count, item, self)
+        heapq.heappush(self.min_heap, (priority, self.entry_count, entry))
+        heapq.heappush(self.max_heap, (-priority, self.entry_count, entry))
+        self.order_deque.append(entry)
         self.entry_count += 1
+        self.size += 1
+        return entry
+
+    def enqueue_many(self, items: Iterable[Tuple[Any, float]]) -> List[QueueEntry]:
+        entries = self._new_entries(items)
+        if _prefer_heapify(len(self.min_heap), len(entries)):
+            self.min_heap.extend((entry.priority, entry.entry_id, entry) for entry in entries)
+            self.max_heap.extend((-entry.priority, entry.entry_id, entry) for entry in entries)
+            heapq.heapify(self.min_heap)
+            heapq.heapify(self.max_heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self.min_heap, (entry.priority, entry.entry_id, entry))
+                heapq.heappush(self.max_heap, (-entry.priority, entry.entry_id, entry))
+        return entries
+
+    def _new_entries(self, items: Iterable[Tuple[Any, float]]) -> List[QueueEntry]:
+        entries = []
+        for item, priority in items:
+            entries.append(self.entry_class(priority, self.entry_count, item, self))
+            self.entry_count += 1
+        self.order_deque.extend(entries)
+        self.size += len(entries)
+        return entries
+
+    def dequeue_many(self, k: int, mode: str = 'highest') -> List[Any]:
+        dequeue = self._mode_method('dequeue', mode)
+        return [dequeue() for _ in range(min(k, self.size))]
+
+    def drain(self, mode: str = 'highest') -> List[Any]:
+        return self.dequeue_many(self.size, mode)
+
+    def update_priority(self, entry: QueueEntry, priority: float) -> None:
+        self._check_entry(entry)
+        entry.priority = priority
+        heapq.heappush(self.min_heap, (priority, entry.entry_id, entry))
+        heapq.heappush(self.max_heap, (-priority, entry.entry_id, entry))
+        self._maybe_compact()
+
+    def remove(self, entry: QueueEntry) -> Any:
+        self._check_entry(entry)
+        return self._take(entry)
+
+    def _check_entry(self, entry: QueueEntry) -> None:
+        if entry.queue is not self or entry.removed:
+            raise ValueError("Entry is not in this queue")
+
+    def _mode_method(self, prefix: str, mode: str) -> Callable[[], Any]:
+        mode = mode.lower()
+        if mode not in _MODES:
+            raise ValueError("Mode must be 'highest', 'lowest', 'oldest', or 'newest'")
+        return getattr(self, f"_{prefix}_{mode}")
 
     def dequeue(self, mode: str = 'highest') -> Any:
         mode = mode.lower()
@@ -43,86 +124,349 @@ class BiPriorityQueue:
 
     def _dequeue_highest(self) -> Any:
         while self.max_heap:
-            neg_priority, entry_id, item = heapq.heappop(self.max_heap)
-            if entry_id not in self.removed:
-                self.removed.add(entry_id)
-                self._remove_from_deque(entry_id)
-                return item
+            neg_priority, entry_id, entry = heapq.heappop(self.max_heap)
+            if not entry.removed and -neg_priority == entry.priority:
+                return self._take(entry)
         raise IndexError("Queue is empty")
 
     def _dequeue_lowest(self) -> Any:
         while self.min_heap:
-            priority, entry_id, item = heapq.heappop(self.min_heap)
-            if entry_id not in self.removed:
-                self.removed.add(entry_id)
-                self._remove_from_deque(entry_id)
-                return item
+            priority, entry_id, entry = heapq.heappop(self.min_heap)
+            if not entry.removed and priority == entry.priority:
+                return self._take(entry)
         raise IndexError("Queue is empty")
 
     def _dequeue_oldest(self) -> Any:
         while self.order_deque:
-            entry_id, item = self.order_deque.popleft()
-            if entry_id not in self.removed:
-                self.removed.add(entry_id)
-                return item
+            entry = self.order_deque.popleft()
+            if not entry.removed:
+                return self._take(entry)
         raise IndexError("Queue is empty")
 
     def _dequeue_newest(self) -> Any:
         while self.order_deque:
-            entry_id, item = self.order_deque.pop()
-            if entry_id not in self.removed:
-                self.removed.add(entry_id)
-                return item
+            entry = self.order_deque.pop()
+            if not entry.removed:
+                return self._take(entry)
         raise IndexError("Queue is empty")
 
     def _peek_highest(self) -> Any:
         while self.max_heap:
-            neg_priority, entry_id, item = self.max_heap[0]
-            if entry_id not in self.removed:
-                return item
+            neg_priority, entry_id, entry = self.max_heap[0]
+            if not entry.removed and -neg_priority == entry.priority:
+                return entry.item
             heapq.heappop(self.max_heap)
         raise IndexError("Queue is empty")
 
     def _peek_lowest(self) -> Any:
         while self.min_heap:
-            priority, entry_id, item = self.min_heap[0]
-            if entry_id not in self.removed:
-                return item
+            priority, entry_id, entry = self.min_heap[0]
+            if not entry.removed and priority == entry.priority:
+                return entry.item
             heapq.heappop(self.min_heap)
         raise IndexError("Queue is empty")
 
     def _peek_oldest(self) -> Any:
         while self.order_deque:
-            entry_id, item = self.order_deque[0]
-            if entry_id not in self.removed:
-                return item
+            entry = self.order_deque[0]
+            if not entry.removed:
+                return entry.item
             self.order_deque.popleft()
         raise IndexError("Queue is empty")
 
     def _peek_newest(self) -> Any:
         while self.order_deque:
-            entry_id, item = self.order_deque[-1]
-            if entry_id not in self.removed:
-                return item
+            entry = self.order_deque[-1]
+            if not entry.removed:
+                return entry.item
             self.order_deque.pop()
         raise IndexError("Queue is empty")
 
-    def _remove_from_deque(self, entry_id: int) -> None:
-        while self.order_deque and self.order_deque[0][0] in self.removed:
+    def _take(self, entry: QueueEntry) -> Any:
+        entry.removed = True
+        self.size -= 1
+        self._remove_from_deque()
+        self._maybe_compact()
+        return entry.item
+
+    def _maybe_compact(self) -> None:
+        dead = self._dead_entries()
+        if dead > self.compact_threshold and dead > 3 * self.size:
+            self.compact()
+
+    def _remove_from_deque(self) -> None:
+        while self.order_deque and self.order_deque[0].removed:
             self.order_deque.popleft()
-        while self.order_deque and self.order_deque[-1][0] in self.removed:
+        while self.order_deque and self.order_deque[-1].removed:
             self.order_deque.pop()
 
+    def _dead_entries(self) -> int:
+        return len(self.min_heap) + len(self.max_heap) + len(self.order_deque) - 3 * self.size
+
+    def compact(self) -> None:
+        self.order_deque = deque(entry for entry in self.order_deque if not entry.removed)
+        self.min_heap = [(entry.priority, entry.entry_id, entry) for entry in self.order_deque]
+        self.max_heap = [(-entry.priority, entry.entry_id, entry) for entry in self.order_deque]
+        heapq.heapify(self.min_heap)
+        heapq.heapify(self.max_heap)
+
     def is_empty(self) -> bool:
-        return len(self.order_deque) == 0 or all(entry[1] in self.removed for entry in self.order_deque)
+        return self.size == 0
 
     def stats(self) -> dict:
         return {
-            'size': len(self.order_deque) - len(self.removed),
-            'removed_entries': len(self.removed),
+            'size': self.size,
+            'removed_entries': self._dead_entries(),
             'total_entries_added': self.entry_count
         }
 
+class _IndexedEntry(QueueEntry):
+    __slots__ = ('pos',)
+
+class MinMaxBiPriorityQueue(BiPriorityQueue):
+    entry_class = _IndexedEntry
+
+    def __init__(self, compact_threshold: int = 1024):
+        self.heap = []
+        self.entry_count = 0
+        self.size = 0
+        self.order_deque = deque()
+        self.compact_threshold = compact_threshold
+
+    def enqueue(self, item: Any, priority: float) -> QueueEntry:
+        entry = _IndexedEntry(priority, self.entry_count, item, self)
+        entry.pos = len(self.heap)
+        self.heap.append(entry)
+        self._bubble_up(entry.pos)
+        self.order_deque.append(entry)
+        self.entry_count += 1
+        self.size += 1
+        return entry
+
+    def enqueue_many(self, items: Iterable[Tuple[Any, float]]) -> List[QueueEntry]:
+        entries = self._new_entries(items)
+        heap = self.heap
+        heapify = _prefer_heapify(len(heap), len(entries))
+        for entry in entries:
+            entry.pos = len(heap)
+            heap.append(entry)
+            if not heapify:
+                self._bubble_up(entry.pos)
+        if heapify:
+            for i in range(len(heap) // 2 - 1, -1, -1):
+                self._push_down(i)
+        return entries
+
+    def update_priority(self, entry: QueueEntry, priority: float) -> None:
+        self._check_entry(entry)
+        entry.priority = priority
+        pos = entry.pos
+        self._bubble_up(pos)
+        self._push_down(pos)
+
+    def _dequeue_highest(self) -> Any:
+        if not self.heap:
+            raise IndexError("Queue is empty")
+        return self._take(self.heap[self._max_index()])
+
+    def _dequeue_lowest(self) -> Any:
+        if not self.heap:
+            raise IndexError("Queue is empty")
+        return self._take(self.heap[0])
+
+    def _peek_highest(self) -> Any:
+        if not self.heap:
+            raise IndexError("Queue is empty")
+        return self.heap[self._max_index()].item
+
+    def _peek_lowest(self) -> Any:
+        if not self.heap:
+            raise IndexError("Queue is empty")
+        return self.heap[0].item
+
+    def _take(self, entry: QueueEntry) -> Any:
+        self._delete_at(entry.pos)
+        return super()._take(entry)
+
+    def _dead_entries(self) -> int:
+        return len(self.order_deque) - self.size
+
+    def compact(self) -> None:
+        self.order_deque = deque(entry for entry in self.order_deque if not entry.removed)
+
+    def _max_index(self) -> int:
+        heap = self.heap
+        if len(heap) < 3:
+            return len(heap) - 1
+        return 1 if self._less(heap[2], heap[1]) else 2
+
+    @staticmethod
+    def _less(a: _IndexedEntry, b: _IndexedEntry) -> bool:
+        return a.priority < b.priority or (a.priority == b.priority and a.entry_id < b.entry_id)
+
+    @staticmethod
+    def _is_min_level(i: int) -> bool:
+        return (i + 1).bit_length() & 1 == 1
+
+    def _swap(self, i: int, j: int) -> None:
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        heap[i].pos = i
+        heap[j].pos = j
+
+    def _delete_at(self, i: int) -> None:
+        heap = self.heap
+        entry = heap[i]
+        last = heap.pop()
+        entry.pos = -1
+        if last is not entry:
+            heap[i] = last
+            last.pos = i
+            self._bubble_up(i)
+            self._push_down(i)
+
+    def _bubble_up(self, i: int) -> None:
+        if i == 0:
+            return
+        heap = self.heap
+        parent = (i - 1) >> 1
+        if self._is_min_level(i):
+            if self._less(heap[parent], heap[i]):
+                self._swap(i, parent)
+                self._bubble_up_grandparents(parent, True)
+            else:
+                self._bubble_up_grandparents(i, False)
+        else:
+            if self._less(heap[i], heap[parent]):
+                self._swap(i, parent)
+                self._bubble_up_grandparents(parent, False)
+            else:
+                self._bubble_up_grandparents(i, True)
+
+    def _bubble_up_grandparents(self, i: int, is_max: bool) -> None:
+        heap = self.heap
+        less = self._less
+        while i > 2:
+            grandparent = (((i - 1) >> 1) - 1) >> 1
+            if less(heap[grandparent], heap[i]) if is_max else less(heap[i], heap[grandparent]):
+                self._swap(i, grandparent)
+                i = grandparent
+            else:
+                return
+
+    def _push_down(self, i: int) -> None:
+        heap = self.heap
+        less = self._less
+        n = len(heap)
+        is_min = self._is_min_level(i)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                return
+            best = child
+            for c in (child + 1, 4 * i + 3, 4 * i + 4, 4 * i + 5, 4 * i + 6):
+                if c < n and (less(heap[c], heap[best]) if is_min else less(heap[best], heap[c])):
+                    best = c
+            if not (less(heap[best], heap[i]) if is_min else less(heap[i], heap[best])):
+                return
+            self._swap(best, i)
+            if best <= child + 1:
+                return
+            parent = (best - 1) >> 1
+            if less(heap[parent], heap[best]) if is_min else less(heap[best], heap[parent]):
+                self._swap(best, parent)
+            i = best
+
+def _prefer_heapify(heap_size: int, batch_size: int) -> bool:
+    return batch_size * max(1, heap_size.bit_length()) > heap_size + batch_size
+
+QUEUE_BACKENDS = {
+    'heaps': BiPriorityQueue,
+    'minmax': MinMaxBiPriorityQueue,
+}
+
+def create_queue(backend: str = 'heaps', **kwargs) -> BiPriorityQueue:
+    try:
+        return QUEUE_BACKENDS[backend.lower()](**kwargs)
+    except KeyError:
+        raise ValueError(f"Backend must be one of {sorted(QUEUE_BACKENDS)}") from None
+
+class AsyncBiPriorityQueue:
+    def __init__(self, maxsize: int = 0, backend: str = 'heaps', **kwargs):
+        self.maxsize = maxsize
+        self.queue = create_queue(backend, **kwargs)
+        self._getters = deque()
+        self._putters = deque()
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def qsize(self) -> int:
+        return len(self.queue)
+
+    def empty(self) -> bool:
+        return self.queue.is_empty()
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self.queue)
+
+    def put_nowait(self, item: Any, priority: float) -> QueueEntry:
+        if self.full():
+            raise asyncio.QueueFull
+        entry = self.queue.enqueue(item, priority)
+        self._wakeup_next(self._getters)
+        return entry
+
+    async def put(self, item: Any, priority: float) -> QueueEntry:
+        await self._wait_while(self.full, self._putters)
+        return self.put_nowait(item, priority)
+
+    def get_nowait(self, mode: str = 'highest') -> Any:
+        if self.queue.is_empty():
+            raise asyncio.QueueEmpty
+        item = self.queue.dequeue(mode)
+        self._wakeup_next(self._putters)
+        return item
+
+    async def get(self, mode: str = 'highest') -> Any:
+        dequeue = self.queue._mode_method('dequeue', mode)
+        await self._wait_while(self.queue.is_empty, self._getters)
+        item = dequeue()
+        self._wakeup_next(self._putters)
+        return item
+
+    async def _wait_while(self, blocked: Callable[[], bool], waiters: deque) -> None:
+        # A waiter that is woken but loses the race keeps its place at the front,
+        # so consumers are served in arrival order whatever mode they ask for.
+        loop = asyncio.get_running_loop()
+        first = True
+        while blocked():
+            waiter = loop.create_future()
+            if first:
+                waiters.append(waiter)
+            else:
+                waiters.appendleft(waiter)
+            first = False
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+                if not blocked() and not waiter.cancelled():
+                    self._wakeup_next(waiters)
+                raise
+
+    @staticmethod
+    def _wakeup_next(waiters: deque) -> None:
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
 if __name__ == "__main__":
     pq = BiPriorityQueue()
     print("Test 3: Unified Interface and Statistics")
@@ -137,4 +481,34 @@ if __name__ == "__main__":
     pq.enqueue("Task E", 2)
     print(f"Dequeue newest: {pq.dequeue('newest')}")   
     print(f"Peek oldest: {pq.peek('oldest')}")       
-    print(f"Stats: {pq.stats()}")
\ No newline at end of file
+    print(f"Stats: {pq.stats()}")
+    print("Test 4: Min-max heap backend")
+    mm = create_queue('minmax')
+    for name, priority in (("Task A", 3), ("Task B", 1), ("Task C", 2)):
+        mm.enqueue(name, priority)
+    print(f"Dequeue highest: {mm.dequeue('highest')}")
+    print(f"Dequeue lowest: {mm.dequeue('lowest')}")
+    print(f"Stats: {mm.stats()}")
+
+    print("Test 5: Bulk operations and handles")
+    bulk = BiPriorityQueue()
+    handles = bulk.enqueue_many([("Task F", 5), ("Task G", 1), ("Task H", 3), ("Task I", 4)])
+    handles[1].update_priority(10)
+    handles[3].remove()
+    print(f"Dequeue many highest: {bulk.dequeue_many(2, 'highest')}")
+    print(f"Drain oldest: {bulk.drain('oldest')}")
+
+
+    print("Test 6: Async producers and consumers")
+    async def run_async_queue() -> None:
+        aq = AsyncBiPriorityQueue(maxsize=2)
+        results = []
+        async def consumer(mode: str) -> None:
+            results.append((mode, await aq.get(mode)))
+        consumers = [asyncio.create_task(consumer(mode)) for mode in ('highest', 'lowest', 'oldest')]
+        for name, priority in (("Job 1", 2), ("Job 2", 9), ("Job 3", 5)):
+            await aq.put(name, priority)
+            await asyncio.sleep(0)
+        await asyncio.gather(*consumers)
+        print(f"Consumed: {results}")
+    asyncio.run(run_async_queue())
\ No newline at end of file
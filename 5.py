@@ -1,5 +1,9 @@
 import asyncio
-from typing import Any, Callable, List
+import inspect
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
 
 async def async_map_callback(arr: List[Any], callback: Callable[[Any], Any], done: Callable[[List[Any]], None]) -> None:
     result = []
@@ -10,19 +14,254 @@ async def async_map_callback(arr: List[Any], callback: Callable[[Any], Any], don
 async def async_map_promise(arr: List[Any], callback: Callable[[Any], Any]) -> List[Any]:
     return await asyncio.gather(*(callback(item) for item in arr))
 
-async def async_map_promise_cancellable(arr: List[Any], callback: Callable[[Any], Any], cancel_event: asyncio.Event) -> List[Any]:
-    tasks = [asyncio.create_task(callback(item)) for item in arr]
+class MapResult:
+    def __init__(self, size: int):
+        self.results = [None] * size
+        self.statuses = ['pending'] * size
+        self.errors: Dict[int, BaseException] = {}
+        self.hedged = 0
+        self.reason = 'completed'
+
+    @property
+    def complete(self) -> bool:
+        return all(status == 'done' for status in self.statuses)
+
+    def completed(self) -> Dict[int, Any]:
+        return {i: result for i, (result, status) in enumerate(zip(self.results, self.statuses)) if status == 'done'}
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for status in self.statuses:
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def __repr__(self) -> str:
+        return f"MapResult(reason={self.reason!r}, counts={self.counts()})"
+
+class MapCancelledError(asyncio.CancelledError):
+    def __init__(self, message: str, partial: MapResult):
+        super().__init__(message)
+        self.partial = partial
+
+async def _hedged(callback: Callable[[Any], Any], item: Any, hedge_after: float, outcome: MapResult) -> Any:
+    attempts = {asyncio.ensure_future(callback(item))}
+    try:
+        done, attempts = await asyncio.wait(attempts, timeout=hedge_after)
+        if done:
+            return done.pop().result()
+        outcome.hedged += 1
+        attempts.add(asyncio.ensure_future(callback(item)))
+        while True:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+            if not attempts:
+                return done.pop().result()
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+        if attempts:
+            await asyncio.gather(*attempts, return_exceptions=True)
+
+async def async_map_partial(arr: List[Any], callback: Callable[[Any], Any], cancel_event: Optional[asyncio.Event] = None,
+                            timeout: Optional[float] = None, item_timeout: Optional[float] = None,
+                            hedge_after: Optional[float] = None) -> MapResult:
+    outcome = MapResult(len(arr))
+
+    async def run_item(i: int, item: Any) -> None:
+        try:
+            if hedge_after is None:
+                call = callback(item)
+            else:
+                call = _hedged(callback, item, hedge_after, outcome)
+            outcome.results[i] = await asyncio.wait_for(call, item_timeout)
+            outcome.statuses[i] = 'done'
+        except asyncio.TimeoutError:
+            outcome.statuses[i] = 'timed_out'
+        except asyncio.CancelledError:
+            outcome.statuses[i] = 'cancelled'
+            raise
+        except Exception as e:
+            outcome.statuses[i] = 'failed'
+            outcome.errors[i] = e
+
+    tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(arr)]
+    watchers = set()
+    if tasks:
+        watchers.add(asyncio.ensure_future(asyncio.gather(*tasks)))
+    if cancel_event is not None:
+        watchers.add(asyncio.create_task(cancel_event.wait()))
     try:
-        await asyncio.wait_for(asyncio.gather(*tasks), timeout=None if cancel_event.is_set() else 0.5)
-        return [await task for task in tasks]
-    except asyncio.CancelledError:
+        if watchers:
+            done, _ = await asyncio.wait(watchers, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                outcome.reason = 'deadline'
+            elif cancel_event is not None and cancel_event.is_set() and not all(task.done() for task in tasks):
+                outcome.reason = 'cancelled'
+    finally:
         for task in tasks:
             task.cancel()
-        raise
-    except asyncio.TimeoutError:
-        for task in tasks:
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*tasks, *watchers, return_exceptions=True)
+    return outcome
+
+async def async_map_promise_cancellable(arr: List[Any], callback: Callable[[Any], Any], cancel_event: asyncio.Event,
+                                        timeout: Optional[float] = 0.5, item_timeout: Optional[float] = None,
+                                        hedge_after: Optional[float] = None) -> List[Any]:
+    outcome = await async_map_partial(arr, callback, cancel_event, timeout, item_timeout, hedge_after)
+    if outcome.complete:
+        return outcome.results
+    if outcome.reason == 'deadline':
+        raise MapCancelledError("Operation cancelled due to timeout", outcome)
+    if outcome.reason == 'cancelled':
+        raise MapCancelledError("Operation cancelled", outcome)
+    if outcome.errors:
+        raise outcome.errors[min(outcome.errors)]
+    raise MapCancelledError("Operation cancelled due to item timeout", outcome)
+
+async def _iterate(iterable: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+def _is_async_callable(callback: Callable[[Any], Any]) -> bool:
+    return inspect.iscoroutinefunction(callback) or inspect.iscoroutinefunction(getattr(callback, '__call__', None))
+
+def _start(callback: Callable[[Any], Any], item: Any) -> asyncio.Future:
+    # Callbacks may be coroutine functions, callables returning awaitables or plain functions.
+    try:
+        result = callback(item)
+    except Exception as e:
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(e)
+        return future
+    if inspect.isawaitable(result):
+        return asyncio.ensure_future(result)
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
+async def async_map(iterable: Union[Iterable[Any], AsyncIterable[Any]], callback: Callable[[Any], Any],
+                    concurrency: int = 16, ordered: bool = True,
+                    executor: Union[str, Executor, None] = None, chunk_size: int = 64) -> AsyncIterator[Any]:
+    if concurrency < 1:
+        raise ValueError("concurrency must be positive")
+    if executor is not None and not _is_async_callable(callback):
+        async for result in async_map_executor(iterable, callback, executor, chunk_size, concurrency, ordered):
+            yield result
+        return
+    source = _iterate(iterable)
+    exhausted = False
+    pending = deque() if ordered else set()
+    probe = executor is None and not _is_async_callable(callback)
+
+    async def fill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(pending) < concurrency:
+            try:
+                item = await source.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                return
+            task = _start(callback, item)
+            if ordered:
+                pending.append(task)
+            else:
+                pending.add(task)
+
+    try:
+        if probe:
+            # Plain functions are only recognisable by calling one: if the first result is not
+            # awaitable, the remaining items go to a thread pool instead of blocking the loop.
+            try:
+                item = await source.__anext__()
+            except StopAsyncIteration:
+                return
+            result = callback(item)
+            if not inspect.isawaitable(result):
+                yield result
+                async for result in async_map_executor(source, callback, 'thread', chunk_size, concurrency, ordered):
+                    yield result
+                return
+            task = asyncio.ensure_future(result)
+            if ordered:
+                pending.append(task)
+            else:
+                pending.add(task)
+        await fill()
+        while pending:
+            if ordered:
+                result = await pending[0]
+                pending.popleft()
+                yield result
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    yield task.result()
+            await fill()
+    finally:
+        for task in pending:
             task.cancel()
-        raise asyncio.CancelledError("Operation cancelled due to timeout")
+        await source.aclose()
+
+def _run_chunk(callback: Callable[[Any], Any], chunk: List[Any]) -> List[Any]:
+    results = []
+    for item in chunk:
+        result = callback(item)
+        if inspect.isawaitable(result):
+            if inspect.iscoroutine(result):
+                result.close()
+            raise TypeError("executor callbacks must return plain values, not awaitables")
+        results.append(result)
+    return results
+
+async def _chunked(iterable: Union[Iterable[Any], AsyncIterable[Any]], chunk_size: int) -> AsyncIterator[List[Any]]:
+    chunk = []
+    async for item in _iterate(iterable):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def async_map_executor(iterable: Union[Iterable[Any], AsyncIterable[Any]], callback: Callable[[Any], Any],
+                             executor: Union[str, Executor, None] = None, chunk_size: int = 64,
+                             concurrency: int = None, ordered: bool = True) -> AsyncIterator[Any]:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if _is_async_callable(callback):
+        raise ValueError("async callbacks cannot run in an executor; use async_map without one")
+    owned = not isinstance(executor, Executor)
+    if executor is None or executor == 'thread':
+        executor = ThreadPoolExecutor()
+    elif executor == 'process':
+        executor = ProcessPoolExecutor()
+    elif owned:
+        raise ValueError("executor must be 'thread', 'process' or an Executor instance")
+    if concurrency is None:
+        concurrency = 2 * (os.cpu_count() or 1)
+    loop = asyncio.get_running_loop()
+
+    async def submit(chunk: List[Any]) -> List[Any]:
+        return await loop.run_in_executor(executor, _run_chunk, callback, chunk)
+
+    try:
+        async for results in async_map(_chunked(iterable, chunk_size), submit, concurrency, ordered):
+            for result in results:
+                yield result
+    finally:
+        if owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def cpu_bound_callback(item: Any) -> Any:
+    return sum(i * i for i in range(item * 10000))
 
 async def example_callback(item: Any) -> Any:
     await asyncio.sleep(1)
@@ -36,15 +275,37 @@ async def async_await_example():
     result = await async_map_promise([1, 2, 3], example_callback)
     print(f"Async/Await result: {result}")
 
+async def streaming_example():
+    print("Streaming Example")
+    results = [result async for result in async_map(range(10), example_callback, concurrency=5)]
+    print(f"Streaming result: {results}")
+
+async def executor_example():
+    print("Executor Example")
+    results = [result async for result in async_map_executor(range(8), cpu_bound_callback, 'process', chunk_size=2)]
+    print(f"Executor result: {results}")
+
 async def cancellable_example():
     print("Cancellable Example")
     cancel_event = asyncio.Event()
     try:
         result = await async_map_promise_cancellable([1, 2, 3], example_callback, cancel_event)
         print(f"Cancellable result: {result}")
+    except MapCancelledError as e:
+        print(f"Cancelled: {e}, partial: {e.partial}")
     except asyncio.CancelledError as e:
         print(f"Cancelled: {e}")
 
+async def partial_results_example():
+    print("Partial Results Example")
+    cancel_event = asyncio.Event()
+    asyncio.get_running_loop().call_later(1.5, cancel_event.set)
+    async def uneven_callback(item: Any) -> Any:
+        await asyncio.sleep(item)
+        return item * 2
+    outcome = await async_map_partial([0.5, 1, 2, 3], uneven_callback, cancel_event, item_timeout=2.5)
+    print(f"Partial result: {outcome}, completed: {outcome.completed()}")
+
 if __name__ == "__main__":
     loop = asyncio.get_event_loop()
     print("Test 1: Callback-based async map")
@@ -54,4 +315,10 @@ if __name__ == "__main__":
     print(f"Promise result: {result}")
     print("\nTest 3: Async/Await and Cancellable async map")
     loop.run_until_complete(async_await_example())
-    loop.run_until_complete(cancellable_example())
\ No newline at end of file
+    loop.run_until_complete(cancellable_example())
+    print("\nTest 4: Bounded-concurrency streaming async map")
+    loop.run_until_complete(streaming_example())
+    print("\nTest 5: Executor-backed async map for CPU-bound callbacks")
+    loop.run_until_complete(executor_example())
+    print("\nTest 6: Cancellation with partial results")
+    loop.run_until_complete(partial_results_example())
\ No newline at end of file
@@ -1,41 +1,272 @@
 import asyncio
-from typing import AsyncIterator, Any, Callable
+import math
+import time
+from collections import deque
+from typing import AsyncIterator, Any, Callable, List, Optional, Sequence
+
+_END = object()
+
+class _SourceError:
+    def __init__(self, error: BaseException):
+        self.error = error
 
 async def data_stream(size: int) -> AsyncIterator[Any]:
     for i in range(size):
         await asyncio.sleep(0.1)
         yield i
 
-async def process_stream(stream: AsyncIterator[Any], processor: Callable[[Any], Any]) -> None:
-    total = 0
-    count = 0
+class RunningStats:
+    __slots__ = ('count', 'total', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def add_many(self, values: Sequence[float]) -> None:
+        n = len(values)
+        if n == 0:
+            return
+        batch_total = sum(values)
+        batch_mean = batch_total / n
+        batch_m2 = sum((value - batch_mean) ** 2 for value in values)
+        count = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / count
+        self.m2 += batch_m2 + delta * delta * self.count * n / count
+        self.count = count
+        self.total += batch_total
+        batch_min = min(values)
+        batch_max = max(values)
+        if self.min is None or batch_min < self.min:
+            self.min = batch_min
+        if self.max is None or batch_max > self.max:
+            self.max = batch_max
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def summary(self) -> str:
+        return (f"Count: {self.count}, Running total: {self.total}, Average: {self.mean:.2f}, "
+                f"Stddev: {self.stddev:.2f}, Min: {self.min}, Max: {self.max}")
+
+class _StreamReporter:
+    def __init__(self, report_interval: Optional[float] = None):
+        self.stats = RunningStats()
+        self.report_interval = report_interval
+        self.next_report = time.monotonic() + (report_interval or 0)
+
+    def observe(self, processed_item: Any) -> None:
+        self.stats.add(processed_item)
+        if self.report_interval is None:
+            stats = self.stats
+            print(f"Processed item: {processed_item}, Running total: {stats.total}, Average: {stats.mean:.2f}, Count: {stats.count}")
+        else:
+            self._maybe_report()
+
+    def observe_batch(self, processed_items: Sequence[Any]) -> None:
+        self.stats.add_many(processed_items)
+        self._maybe_report()
+
+    def _maybe_report(self) -> None:
+        now = time.monotonic()
+        if now >= self.next_report:
+            self.next_report = now + (self.report_interval or 0)
+            print(f"Progress: {self.stats.summary()}")
+
+    def finish(self) -> None:
+        if self.report_interval is not None:
+            print(f"Final: {self.stats.summary()}")
+
+async def batched(stream: AsyncIterator[Any], max_size: int = 100,
+                  max_delay: Optional[float] = None) -> AsyncIterator[List[Any]]:
+    if max_size < 1:
+        raise ValueError("max_size must be positive")
+    source = stream.__aiter__()
+    loop = asyncio.get_running_loop()
+    batch = []
+    deadline = None
+    next_item = None
+    try:
+        while True:
+            if deadline is None and next_item is None:
+                # No partial batch is waiting on max_delay, so there is nothing to race against.
+                try:
+                    item = await source.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                if next_item is None:
+                    next_item = asyncio.ensure_future(source.__anext__())
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait({next_item}, timeout=timeout)
+                if not done:
+                    yield batch
+                    batch = []
+                    deadline = None
+                    continue
+                task, next_item = next_item, None
+                try:
+                    item = task.result()
+                except StopAsyncIteration:
+                    break
+            batch.append(item)
+            if deadline is None and max_delay is not None:
+                deadline = loop.time() + max_delay
+            if len(batch) >= max_size:
+                yield batch
+                batch = []
+                deadline = None
+        if batch:
+            yield batch
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+
+async def _sequential(stream: AsyncIterator[Any], processor: Callable[[Any], Any],
+                      cancel_event: Optional[asyncio.Event] = None) -> AsyncIterator[Any]:
     async for item in stream:
-        processed_item = await processor(item)
-        total += processed_item
-        count += 1
-        avg = total / count if count > 0 else 0
-        print(f"Processed item: {processed_item}, Running total: {total}, Average: {avg:.2f}, Count: {count}")
-
-async def process_stream_cancellable(stream: AsyncIterator[Any], processor: Callable[[Any], Any], cancel_event: asyncio.Event) -> None:
-    total = 0
-    count = 0
+        if cancel_event is not None and cancel_event.is_set():
+            raise asyncio.CancelledError("Stream processing cancelled")
+        yield await processor(item)
+
+async def _pipelined(stream: AsyncIterator[Any], processor: Callable[[Any], Any], concurrency: int,
+                     prefetch: int, ordered: bool, cancel_event: Optional[asyncio.Event] = None) -> AsyncIterator[Any]:
+    buffer = asyncio.Queue(maxsize=max(1, prefetch))
+
+    async def prefetcher() -> None:
+        try:
+            async for item in stream:
+                await buffer.put(item)
+        except Exception as e:
+            await buffer.put(_SourceError(e))
+        else:
+            await buffer.put(_END)
+
+    feeder = asyncio.create_task(prefetcher())
+    cancel_waiter = asyncio.create_task(cancel_event.wait()) if cancel_event is not None else None
+    pending = deque() if ordered else set()
+    getter = None
+    source_done = False
+    cancelled = False
+    try:
+        while True:
+            if getter is None and not source_done and not cancelled and len(pending) < concurrency:
+                getter = asyncio.ensure_future(buffer.get())
+            waiting = set(pending) if not ordered else ({pending[0]} if pending else set())
+            if getter is not None:
+                waiting.add(getter)
+            if not waiting:
+                break
+            if cancel_waiter is not None and not cancelled:
+                waiting.add(cancel_waiter)
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if cancel_waiter in done and not cancelled:
+                # Stop taking new items but let in-flight work finish.
+                cancelled = True
+                if getter is not None:
+                    getter.cancel()
+                    getter = None
+            if getter in done:
+                item = getter.result()
+                getter = None
+                if item is _END:
+                    source_done = True
+                elif isinstance(item, _SourceError):
+                    raise item.error
+                elif ordered:
+                    pending.append(asyncio.ensure_future(processor(item)))
+                else:
+                    pending.add(asyncio.ensure_future(processor(item)))
+            if ordered:
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            else:
+                for task in [task for task in done if task in pending]:
+                    pending.discard(task)
+                    yield task.result()
+        if cancelled:
+            raise asyncio.CancelledError("Stream processing cancelled")
+    finally:
+        leftovers = [task for task in (feeder, getter, cancel_waiter, *pending) if task is not None]
+        for task in leftovers:
+            task.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
+
+def _processed(stream: AsyncIterator[Any], processor: Callable[[Any], Any], concurrency: int, prefetch: int,
+               ordered: bool, cancel_event: Optional[asyncio.Event] = None) -> AsyncIterator[Any]:
+    if concurrency < 1:
+        raise ValueError("concurrency must be positive")
+    if concurrency == 1 and prefetch == 0:
+        return _sequential(stream, processor, cancel_event)
+    return _pipelined(stream, processor, concurrency, prefetch, ordered, cancel_event)
+
+async def process_stream(stream: AsyncIterator[Any], processor: Callable[[Any], Any], concurrency: int = 1,
+                         prefetch: int = 0, ordered: bool = True, report_interval: Optional[float] = None) -> RunningStats:
+    reporter = _StreamReporter(report_interval)
+    async for processed_item in _processed(stream, processor, concurrency, prefetch, ordered):
+        reporter.observe(processed_item)
+    reporter.finish()
+    return reporter.stats
+
+async def process_stream_cancellable(stream: AsyncIterator[Any], processor: Callable[[Any], Any], cancel_event: asyncio.Event,
+                                     concurrency: int = 1, prefetch: int = 0, ordered: bool = True,
+                                     report_interval: Optional[float] = None) -> RunningStats:
+    reporter = _StreamReporter(report_interval)
     try:
-        async for item in stream:
-            if cancel_event.is_set():
-                raise asyncio.CancelledError("Stream processing cancelled")
-            processed_item = await processor(item)
-            total += processed_item
-            count += 1
-            avg = total / count if count > 0 else 0
-            print(f"Processed item: {processed_item}, Running total: {total}, Average: {avg:.2f}, Count: {count}")
+        async for processed_item in _processed(stream, processor, concurrency, prefetch, ordered, cancel_event):
+            reporter.observe(processed_item)
     except asyncio.CancelledError as e:
         print(f"Cancelled: {e}")
+        reporter.finish()
         raise
+    reporter.finish()
+    return reporter.stats
+
+async def process_stream_batched(stream: AsyncIterator[Any], batch_processor: Callable[[List[Any]], Any],
+                                 max_size: int = 100, max_delay: Optional[float] = None, concurrency: int = 1,
+                                 report_interval: Optional[float] = 1.0,
+                                 cancel_event: Optional[asyncio.Event] = None) -> RunningStats:
+    reporter = _StreamReporter(report_interval)
+    batches = batched(stream, max_size, max_delay)
+    async for processed_batch in _processed(batches, batch_processor, concurrency, 0, True, cancel_event):
+        reporter.observe_batch(processed_batch)
+    reporter.finish()
+    return reporter.stats
 
 async def example_processor(item: Any) -> Any:
     await asyncio.sleep(0.05)
     return item * 2
 
+async def example_batch_processor(items: List[Any]) -> List[Any]:
+    await asyncio.sleep(0.05)
+    return [item * 2 for item in items]
+
+async def fast_stream(size: int) -> AsyncIterator[Any]:
+    for i in range(size):
+        if i % 100 == 0:
+            await asyncio.sleep(0.01)
+        yield i
+
 async def cancellable_example():
     cancel_event = asyncio.Event()
     asyncio.get_event_loop().call_later(0.3, cancel_event.set)
@@ -45,8 +276,23 @@ async def cancellable_example():
         print("Cancellable stream processing was stopped gracefully")
     print("Cancellable example completed")
 
+async def pipelined_cancellable_example():
+    cancel_event = asyncio.Event()
+    asyncio.get_event_loop().call_later(0.35, cancel_event.set)
+    try:
+        await process_stream_cancellable(data_stream(10), example_processor, cancel_event, concurrency=4, prefetch=4)
+    except asyncio.CancelledError:
+        print("Pipelined stream processing drained in-flight work and stopped")
+
 if __name__ == "__main__":
     print("Test 3: Stream Processing with Cancellation")
     asyncio.run(process_stream(data_stream(5), example_processor))
     print("\nTest 4: Cancellable Stream Processing")
-    asyncio.run(cancellable_example())
\ No newline at end of file
+    asyncio.run(cancellable_example())
+    print("\nTest 5: Pipelined Stream Processing")
+    asyncio.run(process_stream(data_stream(5), example_processor, concurrency=4, prefetch=4))
+    print("\nTest 6: Pipelined Cancellable Stream Processing")
+    asyncio.run(pipelined_cancellable_example())
+    print("\nTest 7: Micro-batched Stream Processing")
+    asyncio.run(process_stream_batched(fast_stream(10000), example_batch_processor, max_size=500, max_delay=0.02,
+                                       concurrency=2, report_interval=0.1))
\ No newline at end of file
@@ -1,46 +1,255 @@
+import asyncio
+import bisect
+import inspect
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Iterable, Iterator, NamedTuple, Optional
 from pyee import EventEmitter
 
+class ChatMessage(NamedTuple):
+    kind: str
+    sender: Optional[str]
+    text: str
+    message_id: int
+    timestamp: float = 0.0
+
+    def format(self) -> str:
+        if self.kind == 'message':
+            return f"Message from {self.sender}: '{self.text}' (ID: {self.message_id})"
+        return f"Announcement: '{self.text}' (ID: {self.message_id})"
+
+class _Segment:
+    __slots__ = ('path', 'first_id', 'last_id', 'count', 'bytes', 'last_timestamp')
+
+    def __init__(self, path: str, first_id: int):
+        self.path = path
+        self.first_id = first_id
+        self.last_id = first_id - 1
+        self.count = 0
+        self.bytes = 0
+        self.last_timestamp = 0.0
+
+class MessageHistory:
+    def __init__(self, max_count=None, max_bytes=None, max_age=None, directory=None,
+                 segment_bytes=1 << 20, cache_size=1000):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.cache_size = cache_size
+        self._records = []
+        self._sizes = []
+        self._head = 0
+        self.cached_bytes = 0
+        self.segments = []
+        self._file = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._load_segments()
+
+    def __len__(self) -> int:
+        if self.directory is not None:
+            return sum(segment.count for segment in self.segments)
+        return len(self._records) - self._head
+
+    @property
+    def first_id(self) -> Optional[int]:
+        if self.directory is not None:
+            return self.segments[0].first_id if self.segments else None
+        return self._records[self._head].message_id if len(self._records) > self._head else None
+
+    @property
+    def last_id(self) -> int:
+        if len(self._records) > self._head:
+            return self._records[-1].message_id
+        return self.segments[-1].last_id if self.segments else 0
+
+    @property
+    def total_bytes(self) -> int:
+        if self.directory is not None:
+            return sum(segment.bytes for segment in self.segments)
+        return self.cached_bytes
+
+    def append(self, record: ChatMessage) -> None:
+        encoded = (json.dumps(record) + "\n").encode()
+        self._records.append(record)
+        self._sizes.append(len(encoded))
+        self.cached_bytes += len(encoded)
+        if self.directory is not None:
+            self._write(record, encoded)
+        self._enforce_retention(record.timestamp)
+
+    def since(self, message_id: int, until: Optional[int] = None) -> Iterator[ChatMessage]:
+        until = self.last_id if until is None else until
+        cached_first = self._records[self._head].message_id if len(self._records) > self._head else until + 1
+        if message_id + 1 < cached_first and self.directory is not None:
+            yield from self._read_segments(message_id, min(until, cached_first - 1))
+        start = self._head + max(0, message_id + 1 - cached_first)
+        stop = self._head + until + 1 - cached_first
+        for i in range(start, min(stop, len(self._records))):
+            yield self._records[i]
+
+    def _pop_cached(self) -> None:
+        self.cached_bytes -= self._sizes[self._head]
+        self._records[self._head] = None
+        self._head += 1
+        if self._head > 1024 and self._head * 2 > len(self._records):
+            del self._records[:self._head]
+            del self._sizes[:self._head]
+            self._head = 0
+
+    def _enforce_retention(self, now: float) -> None:
+        if self.directory is not None:
+            while len(self._records) - self._head > self.cache_size:
+                self._pop_cached()
+            while len(self.segments) > 1 and self._segment_expired(self.segments[0], now):
+                os.remove(self.segments.pop(0).path)
+            return
+        while len(self._records) > self._head:
+            oldest = self._records[self._head]
+            if not (self.max_count is not None and len(self) > self.max_count
+                    or self.max_bytes is not None and self.cached_bytes > self.max_bytes
+                    or self.max_age is not None and now - oldest.timestamp > self.max_age):
+                return
+            self._pop_cached()
+
+    def _segment_expired(self, segment: _Segment, now: float) -> bool:
+        remaining = self.segments[1:]
+        if self.max_count is not None and sum(s.count for s in remaining) >= self.max_count:
+            return True
+        if self.max_bytes is not None and sum(s.bytes for s in remaining) >= self.max_bytes:
+            return True
+        return self.max_age is not None and now - segment.last_timestamp > self.max_age
+
+    def _write(self, record: ChatMessage, encoded: bytes) -> None:
+        segment = self.segments[-1] if self.segments else None
+        if segment is None or segment.bytes >= self.segment_bytes:
+            if self._file is not None:
+                self._file.close()
+            segment = _Segment(os.path.join(self.directory, f"{record.message_id:020d}.log"), record.message_id)
+            self.segments.append(segment)
+            self._file = open(segment.path, 'ab')
+        elif self._file is None:
+            self._file = open(segment.path, 'ab')
+        self._file.write(encoded)
+        self._file.flush()
+        segment.last_id = record.message_id
+        segment.count += 1
+        segment.bytes += len(encoded)
+        segment.last_timestamp = record.timestamp
+
+    def _read_segments(self, message_id: int, until: int) -> Iterator[ChatMessage]:
+        first_ids = [segment.first_id for segment in self.segments]
+        index = max(0, bisect.bisect_right(first_ids, message_id + 1) - 1)
+        for segment in self.segments[index:]:
+            if segment.first_id > until:
+                return
+            with open(segment.path, 'rb') as f:
+                for line in f:
+                    record = ChatMessage(*json.loads(line))
+                    if record.message_id > until:
+                        return
+                    if record.message_id > message_id:
+                        yield record
+
+    def _load_segments(self) -> None:
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.log'):
+                continue
+            path = os.path.join(self.directory, name)
+            segment = _Segment(path, int(name[:-4]))
+            with open(path, 'rb') as f:
+                for line in f:
+                    record = ChatMessage(*json.loads(line))
+                    segment.last_id = record.message_id
+                    segment.count += 1
+                    segment.bytes += len(line)
+                    segment.last_timestamp = record.timestamp
+            self.segments.append(segment)
+        if self.segments:
+            last_id = self.segments[-1].last_id
+            for record in self._read_segments(max(0, last_id - self.cache_size), last_id):
+                size = len(json.dumps(record)) + 1
+                self._records.append(record)
+                self._sizes.append(size)
+                self.cached_bytes += size
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 class ChatRoom(EventEmitter):
-    def __init__(self):
+    def __init__(self, history: Optional[MessageHistory] = None):
         super().__init__()
-        self.message_count = 0
+        self.history = history
+        self.message_count = history.last_id if history is not None else 0
+        self.subscribers = {}
+        self._snapshot = ()
+
+    def add_subscriber(self, user: 'User', since: Optional[int] = None) -> None:
+        if since is not None and self.history is not None:
+            for record in list(self.history.since(since)):
+                user.deliver(record)
+        self.subscribers[user] = None
+        self._snapshot = tuple(self.subscribers)
+
+    def remove_subscriber(self, user: 'User') -> None:
+        self.subscribers.pop(user, None)
+        self._snapshot = tuple(self.subscribers)
 
     def send_message(self, sender, message):
         self.message_count += 1
-        self.emit('message', sender, message, self.message_count)
+        self._deliver(ChatMessage('message', sender, message, self.message_count, time.time()))
+        if self.listeners('message'):
+            self.emit('message', sender, message, self.message_count)
 
     def send_announcement(self, message):
         self.message_count += 1
-        self.emit('announcement', message, self.message_count)
+        self._deliver(ChatMessage('announcement', None, message, self.message_count, time.time()))
+        if self.listeners('announcement'):
+            self.emit('announcement', message, self.message_count)
+
+    def _deliver(self, record: ChatMessage) -> None:
+        if self.history is not None:
+            self.history.append(record)
+        for user in self._snapshot:
+            user.deliver(record)
 
 class User:
-    def __init__(self, name, chat_room):
+    def __init__(self, name, chat_room, log_size=1000, echo=True):
         self.name = name
         self.chat_room = chat_room
         self.subscribed = False
-        self.log = []
+        self.echo = echo
+        self.log = deque(maxlen=log_size)
 
-    def subscribe(self):
+    def subscribe(self, since=None):
         if not self.subscribed:
-            self.chat_room.on('message', self.receive_message)
-            self.chat_room.on('announcement', self.receive_announcement)
-            self.chat_room.on('message', self.log_message)
-            self.chat_room.on('announcement', self.log_message)
+            self.chat_room.add_subscriber(self, since)
             self.subscribed = True
             print(f"{self.name} subscribed to chat")
 
     def unsubscribe(self):
         if self.subscribed:
-            self.chat_room.remove_listener('message', self.receive_message)
-            self.chat_room.remove_listener('announcement', self.receive_announcement)
-            self.chat_room.remove_listener('message', self.log_message)
-            self.chat_room.remove_listener('announcement', self.log_message)
+            self.chat_room.remove_subscriber(self)
             self.subscribed = False
             print(f"{self.name} unsubscribed from chat")
 
     def send_message(self, message):
         self.chat_room.send_message(self.name, message)
 
+    def deliver(self, record):
+        self.log.append(record)
+        if self.echo:
+            if record.kind == 'message':
+                self.receive_message(record.sender, record.text, record.message_id)
+            else:
+                self.receive_announcement(record.text, record.message_id)
+
     def receive_message(self, sender, message, message_id):
         if sender != self.name:
             print(f"{self.name} received: '{message}' from {sender} (ID: {message_id})")
@@ -51,13 +260,144 @@ class User:
     def log_message(self, *args):
         if len(args) == 3:
             sender, message, message_id = args
-            self.log.append(f"Message from {sender}: '{message}' (ID: {message_id})")
+            self.log.append(ChatMessage('message', sender, message, message_id))
         else:
             message, message_id = args
-            self.log.append(f"Announcement: '{message}' (ID: {message_id})")
+            self.log.append(ChatMessage('announcement', None, message, message_id))
+
+    def formatted_log(self):
+        return [record.format() for record in self.log]
 
     def show_log(self):
-        print(f"{self.name}'s log: {self.log}")
+        print(f"{self.name}'s log: {self.formatted_log()}")
+
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block', 'disconnect')
+
+class AsyncSubscription:
+    def __init__(self, room, name, handler: Callable[[ChatMessage], Any], maxsize=100,
+                 overflow='drop-oldest', block_timeout=1.0, replay: Iterable[ChatMessage] = ()):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.room = room
+        self.name = name
+        self.handler = handler
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.connected = True
+        self.task = asyncio.create_task(self._run(replay))
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def offer(self, record: ChatMessage) -> Optional[Awaitable[None]]:
+        if not self.connected:
+            return None
+        if self.queue.full():
+            if self.overflow == 'drop-newest':
+                self.dropped += 1
+                return None
+            if self.overflow == 'drop-oldest':
+                self.queue.get_nowait()
+                self.dropped += 1
+            elif self.overflow == 'disconnect':
+                self.dropped += 1
+                self.room.disconnect(self)
+                return None
+            else:
+                return self._put_blocking(record)
+        self.queue.put_nowait(record)
+        return None
+
+    async def _put_blocking(self, record: ChatMessage) -> None:
+        try:
+            await asyncio.wait_for(self.queue.put(record), self.block_timeout)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+
+    async def _run(self, replay: Iterable[ChatMessage]) -> None:
+        for record in replay:
+            await self._handle(record)
+        while True:
+            await self._handle(await self.queue.get())
+
+    async def _handle(self, record: ChatMessage) -> None:
+        try:
+            result = self.handler(record)
+            if inspect.isawaitable(result):
+                await result
+            self.delivered += 1
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'connected': self.connected,
+        }
+
+    async def close(self) -> None:
+        self.room.disconnect(self)
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+class AsyncChatRoom:
+    def __init__(self, history: Optional[MessageHistory] = None):
+        self.history = history
+        self.message_count = history.last_id if history is not None else 0
+        self.subscriptions = {}
+        self._snapshot = ()
+
+    def subscribe(self, name, handler: Callable[[ChatMessage], Any], maxsize=100,
+                  overflow='drop-oldest', block_timeout=1.0, since: Optional[int] = None) -> AsyncSubscription:
+        replay = ()
+        if since is not None and self.history is not None:
+            replay = list(self.history.since(since, self.message_count))
+        subscription = AsyncSubscription(self, name, handler, maxsize, overflow, block_timeout, replay)
+        self.subscriptions[subscription] = None
+        self._snapshot = tuple(self.subscriptions)
+        return subscription
+
+    def disconnect(self, subscription: AsyncSubscription) -> None:
+        if subscription.connected:
+            subscription.connected = False
+            subscription.task.cancel()
+            self.subscriptions.pop(subscription, None)
+            self._snapshot = tuple(self.subscriptions)
+
+    async def send_message(self, sender, message) -> ChatMessage:
+        self.message_count += 1
+        return await self._publish(ChatMessage('message', sender, message, self.message_count, time.time()))
+
+    async def send_announcement(self, message) -> ChatMessage:
+        self.message_count += 1
+        return await self._publish(ChatMessage('announcement', None, message, self.message_count, time.time()))
+
+    async def _publish(self, record: ChatMessage) -> ChatMessage:
+        if self.history is not None:
+            self.history.append(record)
+        blocked = [waiter for waiter in (subscription.offer(record) for subscription in self._snapshot) if waiter is not None]
+        if blocked:
+            await asyncio.gather(*blocked)
+        return record
+
+    def stats(self) -> dict:
+        return {subscription.name: subscription.stats() for subscription in self._snapshot}
+
+    async def close(self) -> None:
+        subscriptions = self._snapshot
+        for subscription in subscriptions:
+            self.disconnect(subscription)
+        await asyncio.gather(*(subscription.task for subscription in subscriptions), return_exceptions=True)
 
 if __name__ == "__main__":
     print("Test 3: ChatRoom with Multiple Listeners")
@@ -77,4 +417,31 @@ if __name__ == "__main__":
 
     bob.unsubscribe()
     alice.send_message("Bob, you there?")
-    alice.show_log()
\ No newline at end of file
+    alice.show_log()
+
+    print("\nTest 4: Async ChatRoom with slow-consumer policies")
+    async def run_async_room():
+        room = AsyncChatRoom()
+        fast_log = []
+        async def slow_reader(record):
+            await asyncio.sleep(0.05)
+        room.subscribe("Fast", fast_log.append)
+        room.subscribe("Slow", slow_reader, maxsize=5, overflow='drop-oldest')
+        room.subscribe("Flaky", slow_reader, maxsize=5, overflow='disconnect')
+        for i in range(20):
+            await room.send_message("Alice", f"Update {i}")
+        await asyncio.sleep(0.1)
+        print(f"Room stats: {room.stats()}")
+        await room.close()
+    asyncio.run(run_async_room())
+
+    print("\nTest 5: Late subscriber replay from room history")
+    history_room = ChatRoom(history=MessageHistory(max_count=100))
+    carol = User("Carol", history_room)
+    dave = User("Dave", history_room)
+    carol.subscribe()
+    carol.send_message("First!")
+    history_room.send_announcement("History is on")
+    carol.send_message("Anyone here?")
+    dave.subscribe(since=1)
+    dave.show_log()
\ No newline at end of file
@@ -2,9 +2,16 @@ import aiohttp
 import asyncio
 import logging
 import json
+import copy
+import hashlib
+import time
+from collections import OrderedDict
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
 from concurrent.futures import ThreadPoolExecutor
 import socketserver
+import sys
+from aiohttp import web
 from datetime import datetime, timedelta
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -14,58 +21,213 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
     pass
 
 class AuthProxy:
-    def __init__(self, base_url, auth_config):
+    def __init__(self, base_url, auth_config, limit=100, limit_per_host=0, keepalive_timeout=30.0,
+                 ttl_dns_cache=300, token_pool=None, refresh_margin=1.0, cache_size=None, cache_ttl=30.0,
+                 coalesce=False, cacheable_methods=("GET", "HEAD")):
         self.base_url = base_url
         self.auth_config = auth_config
         self.token = None
         self.token_expiry = None
+        self.refresh_margin = refresh_margin
+        self.token_refreshes = 0
+        self.token_refresh_time = 0.0
+        self.token_wait_time = 0.0
+        self._refresh = None
+        self._refresh_timer = None
+        self.pool_config = {"limit": limit, "limit_per_host": limit_per_host,
+                            "keepalive_timeout": keepalive_timeout, "ttl_dns_cache": ttl_dns_cache}
+        self.token_pool = token_pool
+        self.session = None
+        self.token_session = None
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.coalesce = coalesce
+        self.cacheable_methods = {method.upper() for method in cacheable_methods}
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+
+    def _new_session(self, config):
+        connector = aiohttp.TCPConnector(**config)
+        return aiohttp.ClientSession(connector=connector)
+
+    def _api_session(self):
+        if self.session is None or self.session.closed:
+            self.session = self._new_session(self.pool_config)
+        return self.session
+
+    def _token_session(self):
+        if self.token_pool is None:
+            return self._api_session()
+        if self.token_session is None or self.token_session.closed:
+            self.token_session = self._new_session({**self.pool_config, **self.token_pool})
+        return self.token_session
+
+    async def open(self):
+        self._api_session()
+        if self.auth_config["type"] == "jwt":
+            self._token_session()
+        return self
+
+    async def close(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._refresh is not None:
+            self._refresh.cancel()
+            self._refresh = None
+        for session in (self.session, self.token_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self.session = None
+        self.token_session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     async def get_token(self):
         if self.auth_config["type"] == "jwt":
             if self.token and self.token_expiry > datetime.now():
                 return self.token
-            logger.info("Fetching new JWT token")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.auth_config["token_url"],
-                    json={"client_id": self.auth_config["client_id"], "client_secret": self.auth_config["client_secret"]}
-                ) as response:
-                    data = await response.json()
-                    self.token = data["access_token"]
-                    self.token_expiry = datetime.now() + timedelta(seconds=data["expires_in"])
-                    return self.token
+            start = time.perf_counter()
+            try:
+                return await self._refresh_token()
+            finally:
+                self.token_wait_time += time.perf_counter() - start
         return self.auth_config.get("api_key")
 
+    def _start_refresh(self):
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._fetch_token())
+            self._refresh.add_done_callback(self._refresh_done)
+        return self._refresh
+
+    def _refresh_token(self):
+        return asyncio.shield(self._start_refresh())
+
+    def _refresh_done(self, future):
+        if self._refresh is future:
+            self._refresh = None
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Token refresh failed: {future.exception()}")
+
+    async def _fetch_token(self):
+        logger.info("Fetching new JWT token")
+        start = time.perf_counter()
+        async with self._token_session().post(
+            self.auth_config["token_url"],
+            json={"client_id": self.auth_config["client_id"], "client_secret": self.auth_config["client_secret"]}
+        ) as response:
+            data = await response.json()
+            self.token = data["access_token"]
+            self.token_expiry = datetime.now() + timedelta(seconds=data["expires_in"])
+            self.token_refreshes += 1
+            self.token_refresh_time += time.perf_counter() - start
+            self._schedule_refresh(data["expires_in"])
+            return self.token
+
+    def _schedule_refresh(self, expires_in):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self.refresh_margin is not None and expires_in > self.refresh_margin:
+            self._refresh_timer = asyncio.get_running_loop().call_later(
+                expires_in - self.refresh_margin, self._start_refresh)
+
+    def _cache_key(self, method, url, kwargs):
+        body = json.dumps([kwargs.get("json"), kwargs.get("data"), kwargs.get("params")], sort_keys=True, default=str)
+        return method.upper(), url, body
+
+    def _store(self, key, etag, data):
+        self._cache[key] = (time.monotonic() + self.cache_ttl, etag, copy.deepcopy(data))
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cache_stats(self):
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "revalidated": self.revalidated,
+                "coalesced": self.coalesced, "size": len(self._cache), "in_flight": len(self._inflight)}
+
     async def request(self, method, endpoint, **kwargs):
         url = f"{self.base_url}{endpoint}"
-        headers = kwargs.get("headers", {})
+        if self.cache_size is None and not self.coalesce or method.upper() not in self.cacheable_methods:
+            return await self._send(method, url, None, kwargs)
+        key = self._cache_key(method, url, kwargs)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return copy.deepcopy(entry[2])
+        if not self.coalesce:
+            return await self._send(method, url, key, kwargs)
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            flight = asyncio.ensure_future(self._send(method, url, key, kwargs))
+            self._inflight[key] = flight
+            flight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Every caller gets its own copy so one caller's mutation cannot leak into another's result.
+        return copy.deepcopy(await asyncio.shield(flight))
+
+    async def _send(self, method, url, key, kwargs):
+        headers = dict(kwargs.get("headers", {}))
+        token = await self.get_token()
         if self.auth_config["type"] == "api_key":
-            headers["X-API-Key"] = await self.get_token()
+            headers["X-API-Key"] = token
         else:
-            headers["Authorization"] = f"Bearer {await self.get_token()}"
-        kwargs["headers"] = headers
+            headers["Authorization"] = f"Bearer {token}"
+        entry = None
+        if key is not None and self.cache_size is not None:
+            self.cache_misses += 1
+            entry = self._cache.get(key)
+            if entry is not None and entry[1]:
+                headers["If-None-Match"] = entry[1]
+        kwargs = {**kwargs, "headers": headers}
 
-        async with aiohttp.ClientSession() as session:
-            logger.info(f"Sending {method} request to {url}")
-            try:
-                async with session.request(method, url, **kwargs) as response:
-                    if response.status == 401 and self.auth_config["type"] == "jwt":
-                        logger.info("Token expired, renewing")
+        session = self._api_session()
+        logger.info(f"Sending {method} request to {url}")
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                if response.status == 401 and self.auth_config["type"] == "jwt":
+                    logger.info("Token expired, renewing")
+                    if self.token == token:
                         self.token = None
-                        headers["Authorization"] = f"Bearer {await self.get_token()}"
-                        async with session.request(method, url, headers=headers, **kwargs) as retry_response:
-                            data = await retry_response.json()
-                            logger.info(f"Received response: {retry_response.status} {data}")
-                            return data
-                    data = await response.json()
-                    logger.info(f"Received response: {response.status} {data}")
-                    return data
-            except aiohttp.ClientError as e:
-                logger.error(f"Error in request: {e}")
-                raise
+                    headers["Authorization"] = f"Bearer {await self.get_token()}"
+                    async with session.request(method, url, **kwargs) as retry_response:
+                        return await self._receive(retry_response, key, entry)
+                return await self._receive(response, key, entry)
+        except aiohttp.ClientError as e:
+            logger.error(f"Error in request: {e}")
+            raise
+
+    async def _receive(self, response, key, entry):
+        if response.status == 304 and entry is not None:
+            self.revalidated += 1
+            data = copy.deepcopy(entry[2])
+        else:
+            data = await response.json()
+        logger.info(f"Received response: {response.status} {data}")
+        if key is not None and self.cache_size is not None and response.status in (200, 304):
+            self._store(key, response.headers.get("ETag", entry[1] if entry else None), data)
+        return data
 
 class MockAPIHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self._respond({name: values[-1] for name, values in query.items()})
+
     def do_POST(self):
+        content_length = int(self.headers["Content-Length"])
+        self._respond(json.loads(self.rfile.read(content_length)))
+
+    def _respond(self, data):
         auth_header = self.headers.get("Authorization")
         if auth_header != "Bearer jwt_token":
             self.send_response(401)
@@ -74,13 +236,20 @@ class MockAPIHandler(BaseHTTPRequestHandler):
             self.wfile.write(json.dumps({"error": "Invalid or expired token"}).encode())
             logger.warning("Invalid token received")
             return
-        content_length = int(self.headers["Content-Length"])
-        data = json.loads(self.rfile.read(content_length))
+        response = {"message": "Success", "data": data}
+        body = json.dumps(response).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            logger.info("Mock API responded: 304 Not Modified")
+            return
         self.send_response(200)
         self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
         self.end_headers()
-        response = {"message": "Success", "data": data}
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(body)
         logger.info(f"Mock API responded: {response}")
 
 class MockAuthHandler(BaseHTTPRequestHandler):
@@ -126,6 +295,108 @@ async def stop_mock_server(server, server_task, executor):
     except Exception as e:
         logger.error(f"Error stopping server: {e}")
 
+async def async_api_handler(request):
+    if request.headers.get("Authorization") != "Bearer jwt_token":
+        return web.json_response({"error": "Invalid or expired token"}, status=401)
+    data = await request.json() if request.can_read_body else dict(request.query)
+    body = json.dumps({"message": "Success", "data": data}).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+async def async_auth_handler(request):
+    data = await request.json()
+    if data.get("client_id") == "test_client" and data.get("client_secret") == "test_secret":
+        return web.json_response({"access_token": "jwt_token", "expires_in": 5})
+    return web.json_response({"error": "Invalid credentials"}, status=401)
+
+async def start_async_mock_server(port, handler):
+    app = web.Application()
+    app.router.add_post("/{path:.*}", handler)
+    app.router.add_get("/{path:.*}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "localhost", port).start()
+    logger.info(f"Async mock server started on http://localhost:{port}")
+    return runner
+
+async def stop_async_mock_server(runner):
+    await runner.cleanup()
+    logger.info("Async mock server stopped")
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def load_test(proxy, total_requests=10000, concurrency=100, endpoint="/api/test", method="POST",
+                    distinct=None):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total_requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                value = index if distinct is None else index % distinct
+                if method == "GET":
+                    await proxy.request(method, endpoint, params={"value": value})
+                else:
+                    await proxy.request(method, endpoint, json={"value": value})
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    refreshes, refresh_time, wait_time = proxy.token_refreshes, proxy.token_refresh_time, proxy.token_wait_time
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "token_refreshes": proxy.token_refreshes - refreshes,
+        "token_refresh_ms": (proxy.token_refresh_time - refresh_time) * 1000,
+        "token_wait_ms": (proxy.token_wait_time - wait_time) * 1000,
+    }
+
+async def run_load_test(total_requests=10000, concurrency=100, api_port=8090, auth_port=8091, **proxy_options):
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    api_runner = await start_async_mock_server(api_port, async_api_handler)
+    auth_runner = await start_async_mock_server(auth_port, async_auth_handler)
+    try:
+        auth_config = {
+            "type": "jwt",
+            "token_url": f"http://localhost:{auth_port}/auth/token",
+            "client_id": "test_client",
+            "client_secret": "test_secret"
+        }
+        async with AuthProxy(f"http://localhost:{api_port}", auth_config, **proxy_options) as proxy:
+            report = await load_test(proxy, total_requests, concurrency)
+    finally:
+        await stop_async_mock_server(api_runner)
+        await stop_async_mock_server(auth_runner)
+        logger.setLevel(level)
+    print(f"Load test: {report['requests']} requests, concurrency {report['concurrency']}, "
+          f"{report['errors']} errors in {report['elapsed']:.2f}s")
+    print(f"Throughput: {report['throughput']:.0f} req/s, latency p50 {report['p50_ms']:.2f}ms, "
+          f"p95 {report['p95_ms']:.2f}ms, p99 {report['p99_ms']:.2f}ms")
+    print(f"Token renewals: {report['token_refreshes']} taking {report['token_refresh_ms']:.2f}ms, "
+          f"requests blocked on renewal for {report['token_wait_ms']:.2f}ms")
+    return report
+
 async def main():
     try:
         api_server, api_task, api_executor = await start_mock_server(8080, MockAPIHandler)
@@ -137,14 +408,24 @@ async def main():
             "client_id": "test_client",
             "client_secret": "test_secret"
         }
-        proxy = AuthProxy("http://localhost:8080", auth_config)
+        async with AuthProxy("http://localhost:8080", auth_config, token_pool={"limit_per_host": 2}) as proxy:
+            print("Test 2: JWT Authentication with Token Renewal")
+            response1 = await proxy.request("POST", "/api/test", json={"value": 42})
+            print(f"Response 1: {response1}")
+            await asyncio.sleep(6)
+            response2 = await proxy.request("POST", "/api/test", json={"value": 43})
+            print(f"Response 2: {response2}")
 
-        print("Test 2: JWT Authentication with Token Renewal")
-        response1 = await proxy.request("POST", "/api/test", json={"value": 42})
-        print(f"Response 1: {response1}")
-        await asyncio.sleep(6)
-        response2 = await proxy.request("POST", "/api/test", json={"value": 43})
-        print(f"Response 2: {response2}")
+        async with AuthProxy("http://localhost:8080", auth_config, cache_size=128, cache_ttl=1.0,
+                             coalesce=True) as proxy:
+            print("Test 3: Response cache, revalidation and request coalescing")
+            responses = await asyncio.gather(*(proxy.request("GET", "/api/test", params={"value": 7}) for _ in range(10)))
+            print(f"Coalesced responses: {len(responses)}, all equal: {all(r == responses[0] for r in responses)}")
+            await proxy.request("GET", "/api/test", params={"value": 7})
+            await asyncio.sleep(1.1)
+            await proxy.request("GET", "/api/test", params={"value": 7})
+            await proxy.request("POST", "/api/test", json={"value": 7})
+            print(f"Cache stats: {proxy.cache_stats()}")
 
         await stop_mock_server(api_server, api_task, api_executor)
         await stop_mock_server(auth_server, auth_task, auth_executor)
@@ -153,4 +434,8 @@ async def main():
         logger.error(f"Test error: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "load":
+        args = [int(arg) for arg in sys.argv[2:4]]
+        asyncio.run(run_load_test(*args))
+    else:
+        asyncio.run(main())
\ No newline at end of file
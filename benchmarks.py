@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROFILES = {
+    'quick': {
+        'memoizer_sizes': [100, 1000], 'memoizer_calls': 20000,
+        'queue_sizes': [10 ** 3, 10 ** 4],
+        'map_sizes': [10 ** 3, 10 ** 4],
+        'stream_sizes': [10 ** 3, 10 ** 4],
+        'chat_subscribers': [10, 100], 'chat_messages': 200,
+        'auth_requests': 500, 'auth_concurrency': [10, 50],
+    },
+    'full': {
+        'memoizer_sizes': [100, 1000, 10000], 'memoizer_calls': 200000,
+        'queue_sizes': [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6],
+        'map_sizes': [10 ** 4, 10 ** 5],
+        'stream_sizes': [10 ** 4, 10 ** 5],
+        'chat_subscribers': [10, 100, 1000], 'chat_messages': 1000,
+        'auth_requests': 5000, 'auth_concurrency': [10, 100],
+    },
+}
+
+def load_module(name: str):
+    spec = importlib.util.spec_from_file_location(f"lab_{name}", os.path.join(HERE, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def measure(operation: Callable[[], Any], ops: int, repeat: int) -> Dict[str, float]:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'ops': ops, 'ops_per_sec': ops / best if best > 0 else 0.0}
+
+def bench_memoizer(profile: dict, repeat: int) -> Dict[str, dict]:
+    memo = load_module('3')
+    results = {}
+    calls = profile['memoizer_calls']
+    for size in profile['memoizer_sizes']:
+        rng = random.Random(42)
+        keys = [int(size * 4 * rng.random() ** 3) for _ in range(calls)]
+        for policy in ('LRU', 'LFU', 'ARC', 'tinylfu'):
+            cached = None
+
+            def run():
+                nonlocal cached
+                cached = memo.Memoizer(lambda x: x * x, max_cache_size=size, eviction_policy=policy)
+                for key in keys:
+                    cached(key)
+
+            result = measure(run, calls, repeat)
+            result['hit_rate'] = cached.stats_snapshot()['hit_rate']
+            results[f"memoizer/{policy}/size={size}"] = result
+    return results
+
+def bench_queue(profile: dict, repeat: int) -> Dict[str, dict]:
+    queues = load_module('4')
+    results = {}
+    for size in profile['queue_sizes']:
+        rng = random.Random(42)
+        priorities = [rng.random() for _ in range(size)]
+        for backend in queues.QUEUE_BACKENDS:
+            for mode in queues._MODES:
+                def run():
+                    queue = queues.create_queue(backend)
+                    for i, priority in enumerate(priorities):
+                        queue.enqueue(i, priority)
+                    for _ in range(size):
+                        queue.dequeue(mode)
+
+                results[f"queue/{backend}/{mode}/n={size}"] = measure(run, 2 * size, repeat)
+    return results
+
+async def _increment(item: int) -> int:
+    return item + 1
+
+async def _increment_batch(items: List[int]) -> List[int]:
+    return [item + 1 for item in items]
+
+def _square(item: int) -> int:
+    return item * item
+
+async def _stream(size: int):
+    for i in range(size):
+        yield i
+
+def bench_async_map(profile: dict, repeat: int) -> Dict[str, dict]:
+    mapping = load_module('5')
+    results = {}
+
+    async def drain(iterator):
+        async for _ in iterator:
+            pass
+
+    for size in profile['map_sizes']:
+        items = list(range(size))
+        for ordered in (True, False):
+            results[f"async_map/ordered={ordered}/n={size}"] = measure(
+                lambda: asyncio.run(drain(mapping.async_map(items, _increment, concurrency=16, ordered=ordered))),
+                size, repeat)
+        results[f"async_map_executor/thread/n={size}"] = measure(
+            lambda: asyncio.run(drain(mapping.async_map_executor(items, _square, 'thread'))), size, repeat)
+        results[f"async_map_partial/n={size}"] = measure(
+            lambda: asyncio.run(mapping.async_map_partial(items, _increment)), size, repeat)
+    return results
+
+def bench_process_stream(profile: dict, repeat: int) -> Dict[str, dict]:
+    streams = load_module('6')
+    results = {}
+    for size in profile['stream_sizes']:
+        for concurrency, prefetch in ((1, 0), (8, 64)):
+            results[f"process_stream/concurrency={concurrency}/n={size}"] = measure(
+                lambda: asyncio.run(streams.process_stream(_stream(size), _increment, concurrency=concurrency,
+                                                           prefetch=prefetch, report_interval=3600)),
+                size, repeat)
+        results[f"process_stream_batched/n={size}"] = measure(
+            lambda: asyncio.run(streams.process_stream_batched(_stream(size), _increment_batch,
+                                                               report_interval=3600)),
+            size, repeat)
+    return results
+
+def bench_chat(profile: dict, repeat: int) -> Dict[str, dict]:
+    chat = load_module('7')
+    results = {}
+    messages = profile['chat_messages']
+    for subscribers in profile['chat_subscribers']:
+        def run():
+            room = chat.ChatRoom()
+            users = [chat.User(f"user{i}", room, log_size=100, echo=False) for i in range(subscribers)]
+            for user in users:
+                user.subscribe()
+            for i in range(messages):
+                room.send_message("bench", f"message {i}")
+
+        results[f"chat/sync/subscribers={subscribers}"] = measure(run, messages * subscribers, repeat)
+
+        async def run_async():
+            room = chat.AsyncChatRoom()
+            for i in range(subscribers):
+                room.subscribe(f"user{i}", lambda record: None, maxsize=messages)
+            for i in range(messages):
+                await room.send_message("bench", f"message {i}")
+            await room.close()
+
+        results[f"chat/async/subscribers={subscribers}"] = measure(
+            lambda: asyncio.run(run_async()), messages * subscribers, repeat)
+    return results
+
+def bench_auth_proxy(profile: dict, repeat: int, api_port: int = 8190, auth_port: int = 8191) -> Dict[str, dict]:
+    auth = load_module('8')
+    auth.logger.setLevel(logging.WARNING)
+    results = {}
+    total = profile['auth_requests']
+    auth_config = {
+        "type": "jwt",
+        "token_url": f"http://localhost:{auth_port}/auth/token",
+        "client_id": "test_client",
+        "client_secret": "test_secret"
+    }
+
+    async def run(concurrency, cached):
+        api_runner = await auth.start_async_mock_server(api_port, auth.async_api_handler)
+        auth_runner = await auth.start_async_mock_server(auth_port, auth.async_auth_handler)
+        options = {'cache_size': 1024, 'coalesce': True} if cached else {}
+        try:
+            async with auth.AuthProxy(f"http://localhost:{api_port}", auth_config, **options) as proxy:
+                if cached:
+                    return await auth.load_test(proxy, total, concurrency, method="GET", distinct=64)
+                return await auth.load_test(proxy, total, concurrency)
+        finally:
+            await auth.stop_async_mock_server(api_runner)
+            await auth.stop_async_mock_server(auth_runner)
+
+    for concurrency in profile['auth_concurrency']:
+        for cached in (False, True):
+            reports = [asyncio.run(run(concurrency, cached)) for _ in range(repeat)]
+            best = max(reports, key=lambda report: report['throughput'])
+            name = 'cached_get/' if cached else ''
+            results[f"auth_proxy/{name}concurrency={concurrency}"] = {
+                'seconds': best['elapsed'], 'ops': best['requests'], 'ops_per_sec': best['throughput'],
+                'p50_ms': best['p50_ms'], 'p95_ms': best['p95_ms'], 'p99_ms': best['p99_ms'],
+                'errors': best['errors'],
+            }
+    return results
+
+BENCHMARKS = {
+    'memoizer': bench_memoizer,
+    'queue': bench_queue,
+    'async_map': bench_async_map,
+    'process_stream': bench_process_stream,
+    'chat': bench_chat,
+    'auth_proxy': bench_auth_proxy,
+}
+
+def run_benchmarks(names: List[str], profile_name: str = 'quick', repeat: int = 3) -> dict:
+    profile = PROFILES[profile_name]
+    results = {}
+    for name in names:
+        print(f"Running {name} benchmarks ({profile_name})")
+        for key, result in BENCHMARKS[name](profile, repeat).items():
+            results[key] = result
+            print(f"  {key}: {result['ops_per_sec']:.0f} ops/s ({result['seconds'] * 1000:.2f}ms)")
+    return {
+        'meta': {
+            'profile': profile_name,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    regressions = []
+    for key, result in current['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None or not previous['ops_per_sec']:
+            print(f"  {key}: no baseline")
+            continue
+        change = result['ops_per_sec'] / previous['ops_per_sec'] - 1
+        status = 'REGRESSION' if change < -threshold else 'ok'
+        print(f"  {key}: {previous['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f} ops/s ({change:+.1%}) {status}")
+        if status != 'ok':
+            regressions.append({'benchmark': key, 'baseline': previous['ops_per_sec'],
+                                'current': result['ops_per_sec'], 'change': change})
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks for the lab modules")
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative throughput drop reported as a regression")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    current = run_benchmarks(names, args.profile, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare} (threshold {args.threshold:.0%})")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) found")
+            return 1
+        print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())